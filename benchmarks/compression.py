@@ -0,0 +1,58 @@
+"""Measures the bytes saved and the CPU spent by the CompressionPolicy on sample files
+
+Run with `python benchmarks/compression.py`. No API key is needed, the files are generated locally.
+"""
+
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pysquareblob.utils import CompressionPolicy, File
+
+
+def sample(mimetype: str, size: int) -> bytes:
+    """Generates a sample file of the mimetype with about `size` bytes"""
+
+    rng = random.Random(size)
+    words = ['blob', 'square', 'cloud', 'object', 'storage', 'upload', 'prefix', 'expire']
+    lines: list[bytes] = []
+    total = 0
+    index = 0
+    while total < size:
+        if mimetype == 'text/csv':
+            line = f'{index},{rng.choice(words)}_{rng.randint(0, 9999)},{rng.random():.6f}\n'
+        elif mimetype == 'application/json':
+            line = json.dumps({'id': index, 'name': rng.choice(words), 'value': rng.random()}) + '\n'
+        else:
+            line = ' '.join(rng.choice(words) for _ in range(12)) + '\n'
+        lines.append(line.encode())
+        total += len(lines[-1])
+        index += 1
+    return b''.join(lines)[:size]
+
+
+async def main() -> None:
+    print(f"{'mimetype':<18}{'size':>10}{'level':>7}{'compressed':>12}{'saved':>8}{'cpu ms':>9}{'MB/s':>9}")
+    for mimetype in ('text/csv', 'application/json', 'text/plain'):
+        for size in (65_536, 1_048_576, 10_485_760):
+            file = File(sample(mimetype, size), mimetype)
+            for level in (1, 6, 9):
+                policy = CompressionPolicy(level=level, min_size=0)
+                # gzip runs in a worker thread, so the CPU of the whole process is measured
+                cpu = time.process_time()
+                _, compressed = await policy.compress('sample', file)
+                cpu = time.process_time() - cpu
+                saved = 1 - compressed.size / file.size
+                print(
+                    f'{mimetype:<18}{file.size:>10}{level:>7}{compressed.size:>12}'
+                    f'{saved:>8.1%}{cpu * 1000:>9.1f}{file.size / 1_000_000 / max(cpu, 1e-9):>9.1f}'
+                )
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
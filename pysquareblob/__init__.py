@@ -1,2 +1,6 @@
 """This package helps you interact with Square Cloud Blob API"""
 from .client import Client
+from .monitor import UsageMonitor
+from .pool import ClientPool
+from .scheduler import ExpiryScheduler
+from .utils import CompressionPolicy
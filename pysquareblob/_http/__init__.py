@@ -1,6 +1,7 @@
 """This package handles the most request operations of blob service"""
 
+from .decoder import Decoder
 from .endpoints import Endpoint
 from .http import HttpConnector, Response
 
-__all__ = ['Endpoint', 'HttpConnector', 'Response']
\ No newline at end of file
+__all__ = ['Decoder', 'Endpoint', 'HttpConnector', 'Response']
\ No newline at end of file
@@ -0,0 +1,193 @@
+"""This module contains the decoder used to parse the API responses"""
+
+import json
+from typing import Any, Callable, Generic, TypeVar
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+from .endpoints import Endpoint
+from ..data import Account, Billing, Object
+
+
+T = TypeVar('T')
+
+
+if msgspec is not None:
+
+    class _ObjectStruct(msgspec.Struct):
+        id: str | None = ''
+        size: int | None = 0
+        created_at: str | None = ''
+        expires_at: str | None = ''
+
+    class _ObjectsStruct(msgspec.Struct):
+        objects: list[_ObjectStruct] = []
+
+    class _UsageStruct(msgspec.Struct):
+        objects: int | None = 0
+        storage: int | None = 0
+
+    class _PlanStruct(msgspec.Struct):
+        included: int | None = 0
+
+    class _BillingStruct(msgspec.Struct, rename='camel'):
+        extra_storage: int | float | None = 0
+        storage_price: int | float | None = 0
+        objects_price: int | float | None = 0
+        total_estimate: int | float | None = 0
+
+    class _AccountStruct(msgspec.Struct):
+        usage: _UsageStruct | None = None
+        plan: _PlanStruct | None = None
+        billing: _BillingStruct | None = None
+
+    class _Envelope(msgspec.Struct, Generic[T]):
+        status: str | None = None
+        code: str | None = None
+        response: T | None = None
+
+
+def default_loads() -> Callable[[bytes], Any]:
+    """Returns the fastest JSON decoder installed
+
+    Uses orjson if installed, then msgspec, and the stdlib json otherwise.
+
+    Returns
+    ------------
+    Callable[[bytes], Any]: The function used to decode a JSON body
+    """
+
+    if orjson is not None:
+        return orjson.loads
+    if msgspec is not None:
+        return msgspec.json.decode
+    return json.loads
+
+
+class Decoder:
+    """Decodes the raw body of the API responses
+
+    The `objects` and `account/stats` payloads are decoded straight into
+    `Object` and `Account` instances. When msgspec is installed this is done
+    through typed structs, without building the intermediate dicts.
+
+    Both ways decode the same: missing or null numbers are 0, a missing id or
+    date is '' and a null date is kept as None.
+
+    Parameters
+    ------------
+    loads: Callable[[bytes], Any] | None
+        The function used to decode a JSON body. If None, the fastest decoder
+        installed is used.
+    """
+
+    def __init__(self, loads: Callable[[bytes], Any] | None = None) -> None:
+        self.loads: Callable[[bytes], Any] = loads or default_loads()
+        self.__typed: bool = loads is None and msgspec is not None
+        if self.__typed:
+            self.__objects_decoder = msgspec.json.Decoder(_Envelope[_ObjectsStruct])
+            self.__account_decoder = msgspec.json.Decoder(_Envelope[_AccountStruct])
+
+    def decode(self, body: bytes, endpoint: Endpoint) -> dict[str, Any]:
+        """Decodes the body of a response
+
+        Parameters
+        ------------
+        body: bytes
+            The raw response body
+        endpoint: Endpoint
+            The endpoint used to make the request
+
+        Returns
+        ------------
+        dict[str, Any]: The response json. For the objects listing, `response` is a
+        list[Object] and for the account info it is an Account.
+        """
+
+        if endpoint == Endpoint.objects():
+            return self.__decode_objects(body)
+        if endpoint == Endpoint.account_info():
+            return self.__decode_account(body)
+        return self.loads(body)
+
+    def __decode_objects(self, body: bytes) -> dict[str, Any]:
+        """Decodes the objects listing into a list of Object"""
+
+        if self.__typed:
+            try:
+                data = self.__objects_decoder.decode(body)
+            except msgspec.ValidationError:
+                pass
+            else:
+                objects = data.response.objects if data.response else []
+                return {
+                    'status': data.status, 'code': data.code,
+                    'response': [
+                        Object(
+                            id=item.id or '', size=item.size or 0,
+                            created_at=item.created_at, expires_at=item.expires_at
+                        ) for item in objects
+                    ]
+                }
+        data = self.loads(body)
+        objects = (data.get('response') or {}).get('objects') or []
+        data['response'] = [
+            Object(
+                id=item.get('id') or '', size=item.get('size') or 0,
+                created_at=item.get('created_at', ''), expires_at=item.get('expires_at', '')
+            ) for item in objects
+        ]
+        return data
+
+    def __decode_account(self, body: bytes) -> dict[str, Any]:
+        """Decodes the account stats into an Account"""
+
+        if self.__typed:
+            try:
+                data = self.__account_decoder.decode(body)
+            except msgspec.ValidationError:
+                pass
+            else:
+                account = None
+                if (response := data.response) is not None:
+                    usage = response.usage or _UsageStruct()
+                    billing = response.billing or _BillingStruct()
+                    account = Account(
+                        objects=usage.objects or 0,
+                        storage_occupied=usage.storage or 0,
+                        plan_included=(response.plan or _PlanStruct()).included or 0,
+                        billing=Billing(
+                            extra_storage=billing.extra_storage or 0,
+                            storage_price=billing.storage_price or 0,
+                            objects_price=billing.objects_price or 0,
+                            total_estimate=billing.total_estimate or 0
+                        )
+                    )
+                return {'status': data.status, 'code': data.code, 'response': account}
+        data = self.loads(body)
+        if not (response := data.get('response')):
+            data['response'] = None
+            return data
+        usage_data = response.get('usage') or {}
+        plan_data = response.get('plan') or {}
+        billing_data = response.get('billing') or {}
+        data['response'] = Account(
+            objects=usage_data.get('objects') or 0,
+            storage_occupied=usage_data.get('storage') or 0,
+            plan_included=plan_data.get('included') or 0,
+            billing=Billing(
+                extra_storage=billing_data.get('extraStorage') or 0,
+                storage_price=billing_data.get('storagePrice') or 0,
+                objects_price=billing_data.get('objectsPrice') or 0,
+                total_estimate=billing_data.get('totalEstimate') or 0
+            )
+        )
+        return data
@@ -1,8 +1,10 @@
 import aiohttp
-from typing import Any, Literal
+from contextlib import nullcontext
+from typing import Any, AsyncContextManager, Literal
 
 from io import BufferedIOBase, BufferedReader, BytesIO
 
+from .decoder import Decoder
 from .endpoints import Endpoint
 from ..utils import Logger
 from ..errors import *
@@ -36,7 +38,7 @@ class Response:
     def __init__(self, json: dict[str, Any], endpoint: Endpoint, status_code: int) -> None:
         self._data = json
         self.endpoint = endpoint
-        self.response: list[dict[str, Any]]|dict[str, Any] = self._data.get('response', {})
+        self.response: Any = self._data.get('response', {})
         self.status: Literal['success', 'error'] = self._data.get('status')
         self.status_code = status_code
         self.__check_for_errors()
@@ -47,6 +49,8 @@ class Response:
     
     def __check_for_errors(self):
         """Checks if the response has an error"""
+        if self.status_code == 429:
+            self.__logger.error(f'Too many requests, slow down', RateLimited('Rate limited.'))
         if self.status == 'error':
             error = self._data.get("code")
             self.__logger.warning(f'Error occurred during request: {error}')
@@ -66,11 +70,53 @@ class HttpConnector:
     Parameters
     ------------
     api_key: str
-        Square Cloud API key"""
+        Square Cloud API key
+    decoder: Decoder | None
+        The decoder used to parse the responses. If None, uses the fastest one installed"""
     
-    def __init__(self, api_key: str) -> None:
-        self.session = aiohttp.ClientSession
+    def __init__(self, api_key: str, *, decoder: Decoder | None = None) -> None:
+        self.decoder: Decoder = decoder or Decoder()
         self.__api_key = api_key
+        self.__shared: aiohttp.ClientSession | None = None
+        
+    def session(self, shared: bool = True) -> AsyncContextManager[aiohttp.ClientSession]:
+        """Returns the session used to make a request
+        
+        If a shared session is open, it's reused (and kept open), otherwise a new one is created
+        
+        Parameters
+        ----------------
+        shared: bool
+            If False, always creates a new session. Use it for connections held open while
+            other requests are made, so they can't take all the connections of the shared one
+        
+        Returns
+        ----------------
+        AsyncContextManager[aiohttp.ClientSession]: The session to be used with `async with`
+        """
+        
+        if shared and self.__shared and not self.__shared.closed:
+            return nullcontext(self.__shared)
+        return aiohttp.ClientSession()
+    
+    async def open(self, limit: int = 100) -> None:
+        """Opens a session shared by all the requests, so the connections are pooled
+        
+        Parameters
+        ----------------
+        limit: int
+            The max number of connections open at the same time
+        """
+        
+        if not self.__shared or self.__shared.closed:
+            self.__shared = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=limit))
+    
+    async def close(self) -> None:
+        """Closes the shared session, if open"""
+        
+        if self.__shared:
+            await self.__shared.close()
+            self.__shared = None
         
     async def make_request(self, endpoint: Endpoint, **kwargs) -> Response:
         """Makes a request to the given endpoint
@@ -94,8 +140,11 @@ class HttpConnector:
         if endpoint == Endpoint.upload():
             data = aiohttp.FormData()
             file = kwargs.pop('file')
-            data.add_field('file', file.bytes, content_type=file.mimetype)
+            data.add_field('file', file.bytes, content_type=file.mimetype, filename='file')
             kwargs['data'] = data
         async with self.session() as http:
             async with http.request(endpoint.method, str(endpoint), headers=headers, **kwargs) as response:
-                return Response(await response.json(), endpoint, response.status)
\ No newline at end of file
+                if response.status == 429:
+                    return Response({}, endpoint, response.status)
+                body: bytes = await response.read()
+                return Response(self.decoder.decode(body, endpoint), endpoint, response.status)
\ No newline at end of file
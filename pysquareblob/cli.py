@@ -0,0 +1,361 @@
+"""This module contains the command line interface, run with `python -m pysquareblob`"""
+
+import argparse
+import asyncio
+from fnmatch import fnmatch
+import glob
+import json
+import os
+import re
+import sys
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, TypeVar
+
+from .client import Client
+from .data import Object
+from .utils import CompressionPolicy, File, is_compressed, uploaded_name
+
+
+__all__ = ['main']
+
+T = TypeVar('T')
+
+
+class Stats:
+    """Keeps the counters and latencies of the transfers to show the throughput
+
+    Parameters
+    ------------------
+    live: bool
+        If True, the aggregated throughput is printed to stderr while the transfers run
+    """
+
+    def __init__(self, live: bool = True) -> None:
+        self.live = live
+        self.started: float = time.perf_counter()
+        self.bytes: int = 0
+        self.done: int = 0
+        self.failed: int = 0
+        self.latencies: dict[str, list[float]] = {}
+        self.errors: list[dict[str, str]] = []
+
+    def record(self, operation: str, latency: float, size: int) -> None:
+        """Records a successful operation"""
+
+        self.latencies.setdefault(operation, []).append(latency)
+        self.bytes += size
+        self.done += 1
+
+    def fail(self, operation: str, item: str, error: Exception) -> None:
+        """Records a failed operation"""
+
+        self.failed += 1
+        self.errors.append({'operation': operation, 'item': item, 'error': repr(error)})
+
+    def line(self) -> str:
+        """Returns the aggregated throughput"""
+
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        return (
+            f'{self.done} done, {self.failed} failed, {self.bytes / 1_000_000:.1f} MB '
+            f'| {self.bytes / 1_000_000 / elapsed:.2f} MB/s, {self.done / elapsed:.1f} objects/s'
+        )
+
+    async def show(self, interval: float = 0.5) -> None:
+        """Prints the throughput to stderr every `interval` seconds until cancelled"""
+
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                if self.live:
+                    print(f'\r{self.line()}', end='', file=sys.stderr, flush=True)
+        finally:
+            if self.live:
+                print(f'\r{self.line()}', file=sys.stderr, flush=True)
+
+    def summary(self) -> dict[str, Any]:
+        """Returns the summary of the run, with the latency percentiles of each operation"""
+
+        elapsed = time.perf_counter() - self.started
+        operations: dict[str, Any] = {}
+        for operation, latencies in self.latencies.items():
+            ordered = sorted(latencies)
+            operations[operation] = {
+                'count': len(ordered),
+                'mean': sum(ordered) / len(ordered),
+                'p50': ordered[len(ordered) // 2],
+                'p95': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+                'max': ordered[-1],
+                'latencies': latencies
+            }
+        return {
+            'elapsed': elapsed,
+            'done': self.done,
+            'failed': self.failed,
+            'bytes': self.bytes,
+            'mb_per_second': self.bytes / 1_000_000 / elapsed if elapsed else 0.0,
+            'objects_per_second': self.done / elapsed if elapsed else 0.0,
+            'operations': operations,
+            'errors': self.errors
+        }
+
+
+def object_name(path: str) -> str:
+    """Returns a valid object name from a file path
+
+    The characters out of the a to z, A to Z, 0 to 9, and _ pattern are replaced by _
+    """
+
+    return re.sub(r'[^a-zA-Z0-9_]', '_', os.path.splitext(os.path.basename(path))[0])
+
+
+def has_prefix(obj: Object, prefix: str) -> bool:
+    """Checks if the object is stored under the prefix, matching whole path segments"""
+
+    directory = obj.id.rpartition('/')[0]
+    return f'/{prefix.strip("/")}/' in f'/{directory}/'
+
+
+def expand(patterns: list[str]) -> Iterable[str]:
+    """Yields the items of the patterns, reading one per line from stdin when a pattern is '-'"""
+
+    for pattern in patterns:
+        if pattern == '-':
+            for line in sys.stdin:
+                if line := line.strip():
+                    yield line
+        else:
+            yield pattern
+
+
+def expand_files(patterns: list[str]) -> Iterable[str]:
+    """Yields the files matched by the glob patterns"""
+
+    for pattern in expand(patterns):
+        matches = glob.glob(pattern, recursive=True) if glob.has_magic(pattern) else [pattern]
+        for path in matches:
+            if os.path.isfile(path):
+                yield path
+
+
+async def run_jobs(
+    items: Iterable[T], job: Callable[[T], Awaitable[None]], jobs: int, stats: Stats
+) -> None:
+    """Runs `job` for each item with at most `jobs` running at the same time
+
+    The items are consumed lazily in a thread, so a long list read from stdin starts
+    transferring before it's fully read, without blocking the transfers running.
+    An error raised by a job is recorded as a failure and the worker moves on to the next item.
+    """
+
+    queue: asyncio.Queue = asyncio.Queue(jobs * 2)
+
+    async def worker() -> None:
+        while (item := await queue.get()) is not None:
+            try:
+                await job(item)
+            except Exception as error:
+                stats.fail('job', str(item), error)
+
+    workers = [asyncio.create_task(worker()) for _ in range(jobs)]
+    iterator = iter(items)
+    while (item := await asyncio.to_thread(next, iterator, None)) is not None:
+        await queue.put(item)
+    for _ in workers:
+        await queue.put(None)
+    await asyncio.gather(*workers)
+
+
+async def timed(
+    stats: Stats, operation: str, item: str, size: int | Callable[[], int], call: Awaitable[Any]
+) -> Any:
+    """Awaits a transfer recording its latency, or its failure
+
+    `size` can be a function, called only after the transfer succeeds
+    """
+
+    started = time.perf_counter()
+    try:
+        result = await call
+        if callable(size):
+            size = size()
+    except Exception as error:
+        stats.fail(operation, item, error)
+        return None
+    stats.record(operation, time.perf_counter() - started, size)
+    return result
+
+
+async def matching(client: Client, patterns: list[str]) -> AsyncIterator[Object]:
+    """Yields the objects whose id matches any of the patterns"""
+
+    patterns = list(expand(patterns))
+    for obj in await client.fetch_object_list():
+        if any(fnmatch(obj.id, pattern) for pattern in patterns):
+            yield obj
+
+
+async def upload(client: Client, args: argparse.Namespace, stats: Stats, path: str) -> None:
+    """Uploads a file, reading and validating it in a thread so the other transfers keep running"""
+
+    size = 0
+
+    async def prepare_and_upload() -> Object:
+        nonlocal size
+        file = await asyncio.to_thread(File, path)
+        size = file.size
+        return await client.upload_object(
+            object_name(path), file, prefix=args.prefix, expire=args.expire,
+            compression=CompressionPolicy(min_size=args.compress) if args.compress is not None else None
+        )
+
+    await timed(stats, 'put', path, lambda: size, prepare_and_upload())
+
+
+async def ls(client: Client, args: argparse.Namespace, stats: Stats) -> None:
+    """Lists the objects, one per line"""
+
+    objects: list[Object] | None = await timed(stats, 'ls', 'objects', 0, client.fetch_object_list())
+    for obj in objects or []:
+        if args.prefix and not has_prefix(obj, args.prefix):
+            continue
+        if args.json:
+            line = json.dumps({
+                'id': obj.id, 'size': obj.size, 'url': obj.url,
+                'created_at': obj.created_at, 'expires_at': obj.expires_at
+            })
+        else:
+            line = f'{obj.size:>12}  {obj.created_at or "":<25}  {obj.id}'
+        print(line, flush=False)
+    sys.stdout.flush()
+
+
+async def put(client: Client, args: argparse.Namespace, stats: Stats) -> None:
+    """Uploads the files matched by the patterns"""
+
+    await run_jobs(expand_files(args.paths), lambda path: upload(client, args, stats, path), args.jobs, stats)
+
+
+async def get(client: Client, args: argparse.Namespace, stats: Stats) -> None:
+    """Downloads the objects whose id matches the patterns"""
+
+    objects = [obj async for obj in matching(client, args.patterns)]
+
+    async def download(obj: Object) -> None:
+        await timed(stats, 'get', obj.id, obj.size, client.download_object(obj))
+
+    await run_jobs(objects, download, args.jobs, stats)
+
+
+async def rm(client: Client, args: argparse.Namespace, stats: Stats) -> None:
+    """Deletes the objects whose id matches the patterns"""
+
+    objects = [obj async for obj in matching(client, args.patterns)]
+
+    async def delete(obj: Object) -> None:
+        await timed(stats, 'rm', obj.id, 0, client.delete_object(obj))
+
+    await run_jobs(objects, delete, args.jobs, stats)
+
+
+async def sync(client: Client, args: argparse.Namespace, stats: Stats) -> None:
+    """Uploads the files of a directory that aren't stored yet
+
+    A file is considered stored when an object with the same name (and prefix, if given) exists,
+    compressed or not.
+    """
+
+    stored: set[str] = set()
+    for obj in await client.fetch_object_list():
+        if args.prefix and not has_prefix(obj, args.prefix):
+            continue
+        name = uploaded_name(obj.id)
+        stored.add(name.removesuffix('_gz') if is_compressed(obj.id) else name)
+    paths = (
+        path for path in expand_files([os.path.join(args.directory, '**', '*')])
+        if object_name(path) not in stored
+    )
+
+    await run_jobs(paths, lambda path: upload(client, args, stats, path), args.jobs, stats)
+
+
+def parser() -> argparse.ArgumentParser:
+    """Returns the parser of the command line arguments"""
+
+    parser = argparse.ArgumentParser(prog='python -m pysquareblob', description='Square Cloud Blob CLI')
+    parser.add_argument(
+        '--key', default=os.environ.get('SQUAREBLOB_API_KEY'),
+        help='Your Square Cloud API key. Default is the SQUAREBLOB_API_KEY env var'
+    )
+    parser.add_argument('-j', '--jobs', type=int, default=8, help='Max number of transfers at the same time')
+    parser.add_argument('--summary', help='Writes a JSON summary with the latencies to this path')
+    parser.add_argument('-q', '--quiet', action='store_true', help="Doesn't show the live throughput")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    command = commands.add_parser('ls', help='Lists the objects')
+    command.add_argument('--prefix', help='Only lists the objects with this prefix')
+    command.add_argument('--json', action='store_true', help='Prints one JSON per line')
+    command.set_defaults(handler=ls)
+
+    for name, handler, help in (('put', put, 'Uploads files'), ('sync', sync, 'Uploads the missing files of a directory')):
+        command = commands.add_parser(name, help=help)
+        if name == 'put':
+            command.add_argument('paths', nargs='+', help="Files or globs. Use '-' to read them from stdin")
+        else:
+            command.add_argument('directory', help='The directory to sync')
+        command.add_argument('--prefix', help='The prefix of the objects')
+        command.add_argument('--expire', type=int, help='The expiration of the objects, in days')
+        command.add_argument(
+            '--compress', type=int, nargs='?', const=65_536, metavar='MIN_SIZE',
+            help='Compresses text files of at least MIN_SIZE bytes (default 65536) with gzip'
+        )
+        command.set_defaults(handler=handler)
+
+    command = commands.add_parser('get', help='Downloads objects')
+    command.add_argument('patterns', nargs='+', help="Object ids or globs. Use '-' to read them from stdin")
+    command.add_argument('--dest', default='blobDownloads/', help='The directory to save the objects')
+    command.set_defaults(handler=get)
+
+    command = commands.add_parser('rm', help='Deletes objects')
+    command.add_argument('patterns', nargs='+', help="Object ids or globs. Use '-' to read them from stdin")
+    command.set_defaults(handler=rm)
+    return parser
+
+
+async def run(args: argparse.Namespace) -> Stats:
+    """Runs the command on a single client, sharing its connections between the transfers"""
+
+    stats = Stats(live=not args.quiet and args.command != 'ls')
+    download_path = os.path.join(getattr(args, 'dest', 'blobDownloads/'), '')
+    client = Client(args.key, debug=False, download_path=download_path)
+    await client.open(limit=args.jobs)
+    display = asyncio.create_task(stats.show())
+    try:
+        await args.handler(client, args, stats)
+    finally:
+        display.cancel()
+        await asyncio.gather(display, return_exceptions=True)
+        await client.close()
+    return stats
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Runs the command line interface
+
+    Returns
+    ------------------
+    int: The exit code, 1 if any operation failed
+    """
+
+    args = parser().parse_args(argv)
+    if not args.key:
+        parser().error('the API key is required, pass --key or set SQUAREBLOB_API_KEY')
+    if args.jobs < 1:
+        parser().error('--jobs must be at least 1')
+    stats = asyncio.run(run(args))
+    if args.summary:
+        with open(args.summary, 'w') as file:
+            json.dump({'command': args.command, **stats.summary()}, file, indent=2)
+    for error in stats.errors:
+        print(f"{error['operation']} {error['item']}: {error['error']}", file=sys.stderr)
+    return 1 if stats.failed else 0
@@ -1,13 +1,17 @@
 """This module contains the main interface to interact with Blob"""
 
+import asyncio
+from contextlib import nullcontext
 from io import BytesIO, BufferedIOBase
 import os
-from typing import Any, cast
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, Literal, cast
 
-from .data import Billing
 from .utils import *
 from ._http import *
 from .data import *
+from .errors import FailedToDownload
+from .monitor import UsageMonitor
+from .scheduler import ExpiryScheduler
 
 
 class Client:
@@ -21,6 +25,9 @@ class Client:
         This keyword-only argument sets the timer to clear object list cache of the class
     download_path: str
         The directory where downloaded objects will be stored. Default is 'blobDownloads/'
+    json_loads: Callable[[bytes], Any] | None
+        The function used to decode the API responses. If None, uses orjson or msgspec
+        when installed and the stdlib json otherwise
 
     Property
     ------------------
@@ -35,15 +42,41 @@ class Client:
     
     def __init__(
         self, api_key: str, *, clean_cache_timer: float=60,
-        debug: bool=True, download_path: str='blobDownloads/'
+        debug: bool=True, download_path: str='blobDownloads/',
+        json_loads: Callable[[bytes], Any] | None = None
     ):
-        self.__http: HttpConnector = HttpConnector(api_key)
+        self.__http: HttpConnector = HttpConnector(api_key, decoder=Decoder(json_loads))
         self._cache: Cache = Cache(clean_cache_timer)
+        self._monitor: UsageMonitor | None = None
+        self._scheduler: ExpiryScheduler | None = None
         self.__logger.debug = debug
         if not os.path.exists(download_path):
             os.mkdir(download_path)
         self.download_path = download_path
     
+    async def __aenter__(self) -> 'Client':
+        """Opens a session shared by all the requests of this client"""
+        await self.__http.open()
+        return self
+    
+    async def __aexit__(self, *args: Any) -> None:
+        """Closes the shared session"""
+        await self.__http.close()
+    
+    async def open(self, limit: int = 100) -> None:
+        """Opens a session shared by all the requests of this client, so the connections are
+        pooled instead of opened for each request. Prefer `async with Client(...)`.
+        
+        Params
+        -----------
+        limit: int
+            The max number of connections open at the same time"""
+        await self.__http.open(limit)
+    
+    async def close(self) -> None:
+        """Closes the shared session opened by `open`"""
+        await self.__http.close()
+    
     async def fetch_object_list(self)-> list[Object]:
         """Makes a request to the API to fetch and returns a list of objects.
         
@@ -54,11 +87,15 @@ class Client:
         endpoint = Endpoint.objects()
         self.__logger.info(f'Fetching objects in Square Cloud Blob from {endpoint}.')
         request: Response = await self.__http.make_request(endpoint)
-        objects = request.response.get('objects', [])
+        objects: list[Object] = request.response
         self.__logger.info(f'Found {len(objects)} objects in Square Cloud Blob')
-        for item in objects:
-            if (obj := Object(**item)) not in self._cache.objects:
+        cached_ids = {obj.id for obj in self._cache.objects}
+        for obj in objects:
+            if obj.id not in cached_ids:
+                cached_ids.add(obj.id)
                 self._cache.objects.append(obj)
+        if self._scheduler:
+            self._scheduler.schedule(objects)
         self._cache.schedule_clean()
         return self._cache.objects
     
@@ -74,34 +111,15 @@ class Client:
         endpoint = Endpoint.account_info()
         self.__logger.info(f'Fetching account info in Square Cloud Blob from {endpoint}.')
         request: Response = await self.__http.make_request(endpoint)
-
-        response = request.response
-
-        usage_data = response.get('usage')
-        plan_data = response.get('plan')
-        billing_data = response.get('billing')
-
-        billing = Billing(
-            extra_storage=billing_data.get('extraStorage'),
-            storage_price=billing_data.get('storagePrice'),
-            objects_price=billing_data.get('objectsPrice'),
-            total_estimate=billing_data.get('totalEstimate')
-        )
-
-        self._cache.account_info = Account(
-            objects=usage_data.get('objects'),
-            storage_occupied=usage_data.get('storage'),
-            plan_included=plan_data.get('included'),
-            billing=billing
-
-        )
+        self._cache.account_info = request.response
         self._cache.schedule_clean()
         return self._cache.account_info
     
     async def upload_object(
-        self, name: str, file: str | BufferedIOBase | BytesIO,
+        self, name: str, file: str | BufferedIOBase | BytesIO | File,
         *, mimetype: str|None = None, prefix: str|None = None, expire: int | None = None,
-        auto_download: bool = False, security_hash: bool = False
+        auto_download: bool = False, security_hash: bool = False,
+        compression: CompressionPolicy | None = None
     ) -> Object:
         """Uploads a file to the blob service
         
@@ -110,8 +128,9 @@ class Client:
         name: str
             The name of the file to upload(without extension). 
             Must adhere to the a to z, A to Z, 0 to 9, and _ pattern.
-        file: str | BufferedIOBase | BytesIO
-            The file to upload. Must be a path to the file, or BytesIO or a BufferedIOBase.
+        file: str | BufferedIOBase | BytesIO | File
+            The file to upload. Must be a path to the file, or BytesIO or a BufferedIOBase,
+            or a File already prepared by `prepare_files`.
         
         KEYWORD ONLY
         prefix: str
@@ -122,10 +141,125 @@ class Client:
         auto_download: bool
             If True, dowloads the file when access the URL.
         security_hash: bool
-            Set to true if a security hash is required."""
+            Set to true if a security hash is required.
+        compression: CompressionPolicy
+            If given, eligible files are compressed with gzip before uploading and `_gz` 
+            is appended to the name, so `download_object` decompresses them.
+        
+        Raises
+        ------------
+        QuotaExceeded
+            If a usage monitor is running in 'reject' mode and the upload exceeds its budget"""
+        
+        target_object: File = file if isinstance(file, File) else File(file, mimetype)
+        return await self._upload(
+            name, target_object, prefix=prefix, expire=expire,
+            auto_download=auto_download, security_hash=security_hash, compression=compression
+        )
+    
+    async def prepare_files(
+        self, files: Iterable[str | BufferedIOBase | BytesIO | bytes],
+        *, mimetype: str|None = None, jobs: int = 8
+    ) -> tuple[list[tuple[Any, File]], list[tuple[Any, Exception]]]:
+        """Validates several files at once in a thread pool, without blocking the event loop
+        
+        The stat, size and type validation, reading and mimetype sniffing of each file
+        run in threads, at most `jobs` at the same time.
+        
+        The content of every valid file is kept in memory until the method returns, so for
+        large batches prefer `upload_objects`, which prepares each file right before uploading it.
+        
+        Params
+        ------------
+        files: Iterable[str | BufferedIOBase | BytesIO | bytes]
+            The files to prepare. See `upload_object` for the accepted types.
+        
+        KEYWORD ONLY
+        mimetype: str
+            The mimetype of all the files. If None, it's detected for each one.
+        jobs: int
+            The max number of files being prepared at the same time
+        
+        Returns
+        ------------
+        tuple[list[tuple[Any, File]], list[tuple[Any, Exception]]]: Each valid file with the 
+        File ready to be uploaded, and each invalid file with the reason it's invalid"""
+        
+        semaphore = asyncio.Semaphore(jobs)
+        
+        async def prepare(file: str | BufferedIOBase | BytesIO | bytes) -> File | Exception:
+            async with semaphore:
+                try:
+                    return await asyncio.to_thread(File, file, mimetype)
+                except (ValueError, OSError) as error:
+                    return error
+        
+        sources = list(files)
+        ready: list[tuple[Any, File]] = []
+        invalid: list[tuple[Any, Exception]] = []
+        for source, result in zip(sources, await asyncio.gather(*(prepare(file) for file in sources))):
+            if isinstance(result, Exception):
+                invalid.append((source, result))
+            else:
+                ready.append((source, result))
+        self.__logger.info(f'Prepared {len(ready)} files, {len(invalid)} invalid')
+        return ready, invalid
+    
+    async def upload_objects(
+        self, files: Iterable[tuple[str, str | BufferedIOBase | BytesIO | File]],
+        *, mimetype: str|None = None, jobs: int = 8, **kwargs: Any
+    ) -> list[Object | Exception]:
+        """Uploads several files, `jobs` at a time
+        
+        Each file is prepared in a thread and uploaded as soon as it's ready, so reading and
+        validating the next files overlaps with the uploads running.
+        
+        Params
+        ------------
+        files: Iterable[tuple[str, str | BufferedIOBase | BytesIO | File]]
+            The name and the file of each object to upload
+        
+        KEYWORD ONLY
+        mimetype: str
+            The mimetype of all the files. If None, it's detected for each one.
+        jobs: int
+            The max number of files being prepared or uploaded at the same time
+        kwargs: dict
+            The additional keyword arguments of `upload_object`, like `prefix`
+        
+        Returns
+        ------------
+        list[Object | Exception]: The uploaded objects, in the same order of `files`. 
+        If a file is invalid or its upload fails, its exception is returned instead."""
+        
+        semaphore = asyncio.Semaphore(jobs)
+        
+        async def upload(name: str, file: str | BufferedIOBase | BytesIO | File) -> Object | Exception:
+            async with semaphore:
+                try:
+                    if not isinstance(file, File):
+                        file = await asyncio.to_thread(File, file, mimetype)
+                    return await self._upload(name, file, **kwargs)
+                except Exception as error:
+                    self.__logger.warning(f'Failed to upload object {name}: {error!r}')
+                    return error
+        
+        return list(await asyncio.gather(*(upload(name, file) for name, file in files)))
+    
+    async def _upload(
+        self, name: str, target_object: File | StreamedFile,
+        *, prefix: str|None = None, expire: int | None = None,
+        auto_download: bool = False, security_hash: bool = False,
+        compression: CompressionPolicy | None = None
+    ) -> Object:
+        """Uploads an already validated file to the blob service. See `upload_object` for the params"""
         
         endpoint = Endpoint.upload()
-        target_object: File = File(file, mimetype)
+        if compression and isinstance(target_object, File):
+            size = target_object.size
+            name, target_object = await compression.compress(name, target_object)
+            if target_object.size != size:
+                self.__logger.info(f'Compressed the file from {size} to {target_object.size} bytes')
         query: dict[str, str|int] = {
             "name": name,
             "auto_download": str(auto_download).lower(),
@@ -136,10 +270,136 @@ class Client:
         if expire and (0 < expire <= 365): 
             query.update({'expire': expire})
         self.__logger.info(f'Uploading the file to Square Cloud Blob service on endpoint {endpoint}')
-        request: Response = await self.__http.make_request(endpoint, file=target_object, params=query)
+        reservation = self._monitor.reserve(target_object.size) if self._monitor else nullcontext()
+        async with reservation:
+            request: Response = await self.__http.make_request(endpoint, file=target_object, params=query)
         data = cast(dict[str, Any], request.response)
         object_data = Object(**data)
+        if self._scheduler:
+            self._scheduler.schedule([object_data])
         return object_data
+    
+    async def copy_object(
+        self, obj: Object, target_client: 'Client', name: str, prefix: str|None = None,
+        *, chunk_size: int = 65_536, buffer_chunks: int = 16, **kwargs: Any
+    ) -> Object:
+        """Copies an object to another name, prefix or account without storing it on disk
+        
+        The object is downloaded from its public URL and each chunk is sent to the upload
+        body as it arrives, through a buffer of at most `buffer_chunks` chunks, so the memory
+        used stays the same regardless of the object size.
+        
+        Params
+        ------------
+        obj: Object
+            The object to be copied
+        target_client: Client
+            The client of the account that will store the copy. Can be this same client.
+        name: str
+            The name of the copy(without extension). If the object was compressed by a 
+            `CompressionPolicy`, `_gz` is appended to it when missing, so the copy is still
+            decompressed by `download_object`.
+        prefix: str
+            The prefix of the copy
+        
+        KEYWORD ONLY
+        chunk_size: int
+            The size in bytes of each chunk read from the download
+        buffer_chunks: int
+            The max number of chunks waiting to be uploaded
+        kwargs: dict
+            The additional keyword arguments of `upload_object`, like `expire`
+        
+        Returns
+        ------------
+        Object: The copy of the object
+        
+        Raises
+        ------------
+        FailedToDownload
+            If the object can't be downloaded"""
+        
+        session = self.__http.session
+        self.__logger.info(f'Copying object from {obj.url}')
+        # the download stays open during the upload, so it can't wait for a shared connection
+        async with session(shared=False) as http:
+            async with http.get(obj.url) as response:
+                if response.status != 200:
+                    self.__logger.error(
+                        f'Failed to download object from {obj.url}. Status code: {response.status}',
+                        FailedToDownload(f'Failed to download {obj.url}.')
+                    )
+                buffer: asyncio.Queue[bytes | None] = asyncio.Queue(buffer_chunks)
+                failure: list[BaseException] = []
+                
+                async def read() -> None:
+                    try:
+                        async for chunk in response.content.iter_chunked(chunk_size):
+                            await buffer.put(chunk)
+                    except Exception as error:
+                        failure.append(error)
+                    await buffer.put(None)
+                
+                async def stream() -> AsyncIterator[bytes]:
+                    while (chunk := await buffer.get()) is not None:
+                        yield chunk
+                    if failure:
+                        raise failure[0]
+                
+                reader = asyncio.create_task(read())
+                try:
+                    target_object = StreamedFile(
+                        stream(), response.content_type, response.content_length or obj.size
+                    )
+                    if is_compressed(obj.id) and not name.endswith('_gz'):
+                        name += '_gz'
+                    copy = await target_client._upload(name, target_object, prefix=prefix, **kwargs)
+                finally:
+                    reader.cancel()
+        self.__logger.info(f'Copied object to {copy.url}')
+        return copy
+    
+    async def migrate(
+        self, objects: list[Object], target_client: 'Client', *, prefix: str|None = None,
+        rename: Callable[[Object], str] | None = None, concurrency: int = 4, **kwargs: Any
+    ) -> list[Object | Exception]:
+        """Copies several objects to another prefix or account, `concurrency` at a time
+        
+        Params
+        ------------
+        objects: list[Object]
+            The objects to be copied
+        target_client: Client
+            The client of the account that will store the copies. Can be this same client.
+        
+        KEYWORD ONLY
+        prefix: str
+            The prefix of the copies
+        rename: Callable[[Object], str]
+            Returns the name of the copy of each object. If None, uses the name the object
+            was uploaded with
+        concurrency: int
+            The max number of objects being copied at the same time
+        kwargs: dict
+            The additional keyword arguments of `copy_object`
+        
+        Returns
+        ------------
+        list[Object | Exception]: The copies, in the same order of `objects`. 
+        If a copy fails, its exception is returned instead."""
+        
+        semaphore = asyncio.Semaphore(concurrency)
+        rename = rename or (lambda obj: uploaded_name(obj.id))
+        
+        async def copy(obj: Object) -> Object | Exception:
+            async with semaphore:
+                try:
+                    return await self.copy_object(obj, target_client, rename(obj), prefix, **kwargs)
+                except Exception as error:
+                    self.__logger.warning(f'Failed to copy object {obj.id}: {error!r}')
+                    return error
+        
+        return list(await asyncio.gather(*(copy(obj) for obj in objects)))
                 
     async def delete_object(self, object: Object) -> Response:
         """Delete an object from Square Cloud Blob
@@ -158,16 +418,88 @@ class Client:
         self.__logger.info(f'Deleting the object from Square Cloud Blob service on endpoint {endpoint}')
         request: Response = await self.__http.make_request(endpoint, json=payload)
         self._cache.objects = list(filter(lambda obj: obj.id != object.id, self._cache.objects))
+        if self._monitor:
+            await self._monitor.release(object.size)
+        if self._scheduler:
+            self._scheduler.unschedule(object.id)
         return request
     
-    async def download_object(self, obj: Object) -> None:
+    def start_usage_monitor(
+        self, *, refresh_interval: float = 7200, storage_budget: int | None = None,
+        cost_budget: float | None = None, price_per_gb: float | None = None,
+        mode: Literal['reject', 'wait'] = 'reject', ready_timeout: float = 10.0,
+        retry_interval: float = 60.0
+    ) -> UsageMonitor:
+        """Starts a background monitor of the account usage
+        
+        While it's running, `upload_object` calls are rejected or paused (depending on `mode`) 
+        before they would exceed the budget. See `UsageMonitor` for the params.
+        
+        Returns
+        ---------------
+        UsageMonitor: The running monitor"""
+        if not self._monitor:
+            self._monitor = UsageMonitor(
+                self, refresh_interval=refresh_interval, storage_budget=storage_budget,
+                cost_budget=cost_budget, price_per_gb=price_per_gb, mode=mode,
+                ready_timeout=ready_timeout, retry_interval=retry_interval
+            )
+        self._monitor.start()
+        return self._monitor
+    
+    async def stop_usage_monitor(self) -> None:
+        """Stops the background monitor of the account usage, if running"""
+        if self._monitor:
+            await self._monitor.stop()
+            self._monitor = None
+    
+    def start_expiry_scheduler(
+        self, *, renew: Callable[[Object], Awaitable[Any]] | None = None,
+        renew_ahead: float = 86400, concurrency: int = 4, evict_downloads: bool = True
+    ) -> ExpiryScheduler:
+        """Starts a background scheduler that acts on the objects expiration
+        
+        Expired objects are evicted from the object cache and the download directory,
+        and `renew` is called before they expire. The objects listed or uploaded by this
+        client are scheduled automatically. See `ExpiryScheduler` for the params.
+        
+        Returns
+        ---------------
+        ExpiryScheduler: The running scheduler"""
+        if not self._scheduler:
+            self._scheduler = ExpiryScheduler(
+                self, renew=renew, renew_ahead=renew_ahead,
+                concurrency=concurrency, evict_downloads=evict_downloads
+            )
+            self._scheduler.schedule(self._cache.objects)
+        self._scheduler.start()
+        return self._scheduler
+    
+    async def stop_expiry_scheduler(self) -> None:
+        """Stops the background scheduler of the objects expiration, if running"""
+        if self._scheduler:
+            await self._scheduler.stop()
+            self._scheduler = None
+    
+    async def download_object(self, obj: Object, *, decompress: bool = True, chunk_size: int = 65_536) -> None:
         """This method downloads an object from Square Cloud Blob and saves it on the directory specified on this
         class instance. If not specified, the object will be downloaded and stored in `root/blobDownloads` 
         
+        The object is written to the file in chunks while it's downloaded.
+        
         Params
         -----------------
         obj: Object
             The object to be downloaded. Use one object from the property `objects`.
+        decompress: bool
+            If True, objects uploaded with a `CompressionPolicy` are decompressed while downloaded.
+        chunk_size: int
+            The size in bytes of each chunk read from the download
+        
+        Raises
+        -----------------
+        FailedToDownload
+            If the object can't be downloaded
         """
         
         session = self.__http.session
@@ -176,13 +508,18 @@ class Client:
             async with http.get(obj.url) as response:
                 if response.status == 200:
                     self.__logger.info(f'Object download status code: {response.status}')
-                    content: bytes = await response.content.read()
+                    decompressor = Decompressor(obj.id if decompress else '')
                     path: str = self.download_path+obj.id.split('/')[-1]
                     with open(path, 'wb') as file:
-                        file.write(content)
+                        async for chunk in response.content.iter_chunked(chunk_size):
+                            file.write(decompressor.feed(chunk))
+                        file.write(decompressor.flush())
                     self.__logger.info(f'Downloaded object and saved in {path}')
                 else:
-                    self.__logger.warning(f'Failed to download object from {obj.url}. Status code: {response.status}')
+                    self.__logger.error(
+                        f'Failed to download object from {obj.url}. Status code: {response.status}',
+                        FailedToDownload(f'Failed to download {obj.url}. Status code: {response.status}')
+                    )
         
     @property
     async def account_info(self) -> Account:
@@ -1,6 +1,7 @@
 """This file contains all dataclasses """
 
 from dataclasses import dataclass
+from datetime import datetime, timezone
 
 
 __all__ = ['Account', 'Object', 'Billing']
@@ -69,8 +70,11 @@ class Object:
         The date and time the object was created.
     expires_at: str
         The date and time the object will expire.
+    expiration: datetime | None
+        The date and time the object will expire, parsed. None if it never expires.
     """
 
+    __slots__ = ('_id', '_size', '_created_at', '_expires_at')
 
     def __init__(self, **kwargs) -> None:
         
@@ -101,4 +105,16 @@ class Object:
     
     @property
     def expires_at(self) -> str:
-        return self._expires_at
\ No newline at end of file
+        return self._expires_at
+    
+    @property
+    def expiration(self) -> datetime | None:
+        if not self._expires_at:
+            return None
+        try:
+            expiration = datetime.fromisoformat(self._expires_at)
+        except ValueError:
+            return None
+        if expiration.tzinfo is None:
+            expiration = expiration.replace(tzinfo=timezone.utc)
+        return expiration
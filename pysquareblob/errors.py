@@ -20,4 +20,16 @@ class InvalidFile(Exception):
     """Represents an InvalidFile"""
 
 class InvalidPrefix(Exception):
-    """Represents an Invalid Prefix"""
\ No newline at end of file
+    """Represents an Invalid Prefix"""
+
+class FailedToDownload(Exception):
+    """Represents a FailedToDownload error"""
+
+class RateLimited(Exception):
+    """Represents a RateLimited error"""
+
+class QuotaExceeded(Exception):
+    """Represents an upload that would exceed the usage budget"""
+
+class UsageUnavailable(Exception):
+    """Represents missing account usage info"""
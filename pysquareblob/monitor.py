@@ -0,0 +1,271 @@
+"""This module contains the account usage monitor used to keep uploads inside a budget"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, AsyncIterator, Literal
+
+from .data import Account
+from .errors import QuotaExceeded, UsageUnavailable
+from .utils import Logger
+
+if TYPE_CHECKING:
+    from .client import Client
+
+
+__all__ = ['UsageMonitor']
+
+
+class UsageMonitor:
+    """Keeps track of the account usage and admits uploads only while they fit in the budget
+
+    The account info is refreshed in background every `refresh_interval` seconds. Between
+    refreshes the bytes being uploaded and the bytes already uploaded are tracked locally,
+    on top of the last snapshot, so no extra request is made per upload.
+
+    Parameters
+    ------------------
+    client: Client
+        The client used to refresh the account info
+    refresh_interval: float
+        The time in seconds between each account info refresh. Default is two hours,
+        the same interval the API updates the account info.
+    storage_budget: int | None
+        The max storage, in bytes, the account may occupy. If None, uses the storage
+        included on the plan.
+    cost_budget: float | None
+        The max total estimate, in BRL. If None, the cost is not checked.
+    price_per_gb: float | None
+        The price of each extra GB, in BRL. If None, it is estimated from the billing info.
+    mode: Literal['reject', 'wait']
+        If 'reject', uploads over the budget raise QuotaExceeded. If 'wait', they are
+        paused until there is room for them. An upload larger than the whole storage
+        budget is always rejected.
+    ready_timeout: float
+        The max time in seconds an upload waits for the first account info snapshot
+        before raising UsageUnavailable
+    retry_interval: float
+        The time in seconds before retrying a refresh that failed
+
+    Attributes
+    ------------------
+    account: Account | None
+        The last account info snapshot
+    in_flight: int
+        The bytes being uploaded right now
+    committed: int
+        The bytes uploaded (or deleted, if negative) since the last snapshot
+    """
+
+    __logger = Logger(True)
+
+    def __init__(
+        self, client: 'Client', *, refresh_interval: float = 7200,
+        storage_budget: int | None = None, cost_budget: float | None = None,
+        price_per_gb: float | None = None, mode: Literal['reject', 'wait'] = 'reject',
+        ready_timeout: float = 10.0, retry_interval: float = 60.0
+    ) -> None:
+        if mode not in ('reject', 'wait'):
+            raise ValueError(f'Invalid mode: {mode}')
+        self.client = client
+        self.refresh_interval = refresh_interval
+        self.storage_budget = storage_budget
+        self.cost_budget = cost_budget
+        self.price_per_gb = price_per_gb
+        self.mode = mode
+        self.ready_timeout = ready_timeout
+        self.retry_interval = retry_interval
+        self.account: Account | None = None
+        self.in_flight: int = 0
+        self.committed: int = 0
+        self._task: asyncio.Task | None = None
+        self._ready: asyncio.Event = asyncio.Event()
+        self._changed: asyncio.Condition = asyncio.Condition()
+
+    def start(self) -> None:
+        """Starts refreshing the account info in background"""
+
+        if self._task and not self._task.done():
+            return
+        self._task = asyncio.get_event_loop().create_task(self.__run())
+
+    async def stop(self) -> None:
+        """Stops the background refresh"""
+
+        if not self._task:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def __run(self) -> None:
+        """Refreshes the account info every `refresh_interval` seconds"""
+
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:
+                self.__logger.warning(f'Failed to refresh the account usage: {error!r}')
+                await asyncio.sleep(min(self.retry_interval, self.refresh_interval))
+                continue
+            await asyncio.sleep(self.refresh_interval)
+
+    async def refresh(self) -> Account:
+        """Fetches the account info and updates the snapshot
+
+        The locally committed bytes are dropped only when the snapshot changes, since
+        the API may still be reporting the usage from before those uploads.
+
+        Returns
+        ------------------
+        Account: The new account info snapshot
+
+        Raises
+        ------------------
+        UsageUnavailable: If the API didn't return the account info
+        """
+
+        account = await self.client.fetch_account_info()
+        if not isinstance(account, Account):
+            raise UsageUnavailable(f'The API returned no account info: {account!r}')
+        async with self._changed:
+            if self.account is None or account.storage_occupied != self.account.storage_occupied:
+                self.committed = 0
+            self.account = account
+            self._ready.set()
+            self._changed.notify_all()
+        self.__logger.info(
+            f'Account usage refreshed: {account.storage_occupied} of {account.plan_included} bytes'
+        )
+        return account
+
+    @property
+    def projected_storage(self) -> int:
+        """The storage the account will occupy after the uploads in flight"""
+
+        occupied = self.account.storage_occupied if self.account else 0
+        return occupied + self.committed + self.in_flight
+
+    def projected_cost(self, size: int = 0) -> float | None:
+        """Estimates the total cost after uploading `size` more bytes
+
+        Params
+        ------------------
+        size: int
+            The bytes to be uploaded
+
+        Returns
+        ------------------
+        float | None: The estimated total, in BRL. None if the price can't be estimated.
+        """
+
+        if not self.account:
+            return None
+        billing = self.account.billing
+        if self.price_per_gb is not None:
+            price_per_byte = self.price_per_gb / 1024**3
+        elif billing.extra_storage:
+            price_per_byte = billing.storage_price / billing.extra_storage
+        else:
+            return None
+        extra = max(0, self.projected_storage + size - self.account.plan_included)
+        return billing.total_estimate + max(0, extra - billing.extra_storage) * price_per_byte
+
+    @property
+    def budget(self) -> int:
+        """The max storage, in bytes, the account may occupy"""
+
+        if self.storage_budget is not None:
+            return self.storage_budget
+        return self.account.plan_included if self.account else 0
+
+    def fits(self, size: int) -> bool:
+        """Checks if `size` more bytes fit in the budget
+
+        Params
+        ------------------
+        size: int
+            The bytes to be uploaded
+
+        Returns
+        ------------------
+        bool: True if the upload fits in the budget
+        """
+
+        if not self.account:
+            return False
+        if self.projected_storage + size > self.budget:
+            return False
+        if self.cost_budget is not None:
+            cost = self.projected_cost(size)
+            if cost is not None and cost > self.cost_budget:
+                return False
+        return True
+
+    @asynccontextmanager
+    async def reserve(self, size: int) -> AsyncIterator[None]:
+        """Reserves `size` bytes for an upload while it's in flight
+
+        If the upload succeeds the bytes are committed, otherwise they're released.
+
+        Params
+        ------------------
+        size: int
+            The bytes to be uploaded
+
+        Raises
+        ------------------
+        UsageUnavailable: If there's no account info snapshot after `ready_timeout` seconds
+        QuotaExceeded: If mode is 'reject' and the upload doesn't fit in the budget, or
+        if the upload is larger than the whole storage budget
+        """
+
+        try:
+            await asyncio.wait_for(self._ready.wait(), self.ready_timeout)
+        except asyncio.TimeoutError:
+            self.__logger.error(
+                'The account usage is unavailable, check if the API is reachable',
+                UsageUnavailable(f'No account info after {self.ready_timeout}s.')
+            )
+        async with self._changed:
+            if size > self.budget:
+                self.__logger.error(
+                    f'Upload of {size} bytes is larger than the budget',
+                    QuotaExceeded(f'Upload of {size} bytes is larger than the {self.budget} bytes budget.')
+                )
+            if self.mode == 'wait':
+                await self._changed.wait_for(lambda: self.fits(size))
+            elif not self.fits(size):
+                self.__logger.error(
+                    f'Upload of {size} bytes would exceed the budget',
+                    QuotaExceeded(f'Upload of {size} bytes exceeds the budget.')
+                )
+            self.in_flight += size
+        try:
+            yield
+        except BaseException:
+            async with self._changed:
+                self.in_flight -= size
+                self._changed.notify_all()
+            raise
+        async with self._changed:
+            self.in_flight -= size
+            self.committed += size
+            self._changed.notify_all()
+
+    async def release(self, size: int) -> None:
+        """Records that `size` bytes were freed, like when an object is deleted
+
+        Params
+        ------------------
+        size: int
+            The bytes freed
+        """
+
+        async with self._changed:
+            self.committed -= size
+            self._changed.notify_all()
@@ -0,0 +1,256 @@
+"""This module contains the client pool used to spread the load across several accounts"""
+
+import asyncio
+from bisect import bisect
+import hashlib
+from io import BytesIO, BufferedIOBase
+from typing import Any, Awaitable, Callable, Literal, TypeVar
+
+from .client import Client
+from .data import Account, Object
+from .errors import RateLimited, Unauthorized
+from .utils import Logger
+
+
+__all__ = ['ClientPool']
+
+T = TypeVar('T')
+
+
+class ClientPool:
+    """Holds several clients, one for each API key, and spreads the requests between them
+
+    Parameters
+    ------------------
+    api_keys: list[str]
+        The Square Cloud API keys, one for each account
+    strategy: Literal['hash', 'least_loaded', 'least_storage']
+        How uploads are routed. 'hash' uses a consistent hash of the prefix and name,
+        'least_loaded' picks the client with fewer requests in flight and 'least_storage'
+        picks the account with less storage occupied.
+    prefix_affinity: bool
+        If True, the 'hash' strategy only hashes the prefix, so all the objects of a
+        prefix are stored in the same account
+    replicas: int
+        The number of points each key has on the consistent hash ring
+    cooldown: float
+        The time in seconds a rate limited key is skipped
+    client_kwargs: dict
+        The keyword arguments passed to each Client
+
+    Attributes
+    ------------------
+    clients: list[Client]
+        The clients of the pool, in the same order of the keys
+    """
+
+    __logger = Logger(True)
+
+    def __init__(
+        self, api_keys: list[str], *,
+        strategy: Literal['hash', 'least_loaded', 'least_storage'] = 'hash',
+        prefix_affinity: bool = False, replicas: int = 100, cooldown: float = 60.0, **client_kwargs: Any
+    ) -> None:
+        if not api_keys:
+            raise ValueError('At least one API key is required')
+        if strategy not in ('hash', 'least_loaded', 'least_storage'):
+            raise ValueError(f'Invalid strategy: {strategy}')
+        self.clients: list[Client] = [Client(key, **client_kwargs) for key in api_keys]
+        self.strategy = strategy
+        self.prefix_affinity = prefix_affinity
+        self.cooldown = cooldown
+        self._ring: list[tuple[int, int]] = sorted(
+            (self.__hash(f'{key}:{replica}'), index)
+            for index, key in enumerate(api_keys)
+            for replica in range(replicas)
+        )
+        self._ring_hashes: list[int] = [point for point, _ in self._ring]
+        self._in_flight: list[int] = [0] * len(self.clients)
+        self._uploaded: list[int] = [0] * len(self.clients)
+        self._snapshots: list[int | None] = [None] * len(self.clients)
+        self._disabled: set[int] = set()
+        self._limited_until: dict[int, float] = {}
+        self._owners: dict[str, int] = {}
+
+    @staticmethod
+    def __hash(key: str) -> int:
+        return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], 'big')
+
+    def __available(self, index: int) -> bool:
+        """Checks if the client can receive requests"""
+
+        if index in self._disabled:
+            return False
+        until = self._limited_until.get(index)
+        return until is None or until <= asyncio.get_event_loop().time()
+
+    async def __candidates(self, key: str) -> list[int]:
+        """Returns the indexes of the clients in the order they should be tried"""
+
+        if self.strategy == 'hash':
+            start = bisect(self._ring_hashes, self.__hash(key))
+            order: list[int] = []
+            for offset in range(len(self._ring)):
+                index = self._ring[(start + offset) % len(self._ring)][1]
+                if index not in order:
+                    order.append(index)
+                    if len(order) == len(self.clients):
+                        break
+        elif self.strategy == 'least_loaded':
+            order = sorted(range(len(self.clients)), key=lambda index: self._in_flight[index])
+        else:
+            usage: list[int] = []
+            for index, client in enumerate(self.clients):
+                if not self.__available(index):
+                    usage.append(self._uploaded[index])
+                    continue
+                try:
+                    account = await client.account_info
+                except Exception as error:
+                    self.__logger.warning(f'Failed to get the account info of API key #{index}: {error!r}')
+                    account = None
+                if not isinstance(account, Account):
+                    usage.append(self._uploaded[index])
+                    continue
+                if account.storage_occupied != self._snapshots[index]:
+                    # the new snapshot already counts the objects uploaded before it
+                    self._snapshots[index] = account.storage_occupied
+                    self._uploaded[index] = 0
+                usage.append(account.storage_occupied + self._uploaded[index])
+            order = sorted(range(len(self.clients)), key=lambda index: usage[index])
+        available = [index for index in order if self.__available(index)]
+        if not available:
+            self.__logger.error('No API key is available', RateLimited('All API keys are unavailable.'))
+        return available
+
+    def __mark_failed(self, index: int, error: Exception) -> None:
+        """Skips a client after it fails with an authorization or rate limit error"""
+
+        if isinstance(error, Unauthorized):
+            self.__logger.warning(f'API key #{index} is unauthorized, removing it from the pool')
+            self._disabled.add(index)
+        else:
+            self.__logger.warning(f'API key #{index} is rate limited, skipping it for {self.cooldown}s')
+            self._limited_until[index] = asyncio.get_event_loop().time() + self.cooldown
+
+    async def __run(self, index: int, call: Callable[[Client], Awaitable[T]]) -> T:
+        """Runs a call on a client keeping count of the requests in flight"""
+
+        self._in_flight[index] += 1
+        try:
+            return await call(self.clients[index])
+        finally:
+            self._in_flight[index] -= 1
+
+    async def __failover(self, candidates: list[int], call: Callable[[Client], Awaitable[T]]) -> tuple[int, T]:
+        """Tries the call on each candidate until one doesn't fail with an authorization
+        or rate limit error"""
+
+        error: Exception | None = None
+        for index in candidates:
+            if not self.__available(index):
+                continue
+            try:
+                return index, await self.__run(index, call)
+            except (Unauthorized, RateLimited) as exc:
+                self.__mark_failed(index, exc)
+                error = exc
+        raise error or RateLimited('All API keys are unavailable.')
+
+    async def upload_object(
+        self, name: str, file: str | BufferedIOBase | BytesIO, *, prefix: str | None = None, **kwargs: Any
+    ) -> Object:
+        """Uploads a file to one of the accounts of the pool
+
+        The account is chosen by the pool strategy. If it's unauthorized or rate limited,
+        the next one is tried. Takes the same params as `Client.upload_object`.
+
+        Returns
+        ------------------
+        Object: The uploaded object
+        """
+
+        if isinstance(file, (BufferedIOBase, BytesIO)):
+            file = file.read()
+        key = prefix if self.prefix_affinity and prefix else f'{prefix or ""}/{name}'
+        candidates = await self.__candidates(key)
+        index, obj = await self.__failover(
+            candidates, lambda client: client.upload_object(name, file, prefix=prefix, **kwargs)
+        )
+        self._owners[obj.id] = index
+        self._uploaded[index] += obj.size
+        return obj
+
+    async def fetch_object_list(self) -> list[Object]:
+        """Fetches the objects of every account at once and merges them
+
+        Accounts that are unauthorized or rate limited are skipped.
+
+        Returns
+        ------------------
+        list[Object]: The objects of all the accounts
+        """
+
+        indexes = [index for index in range(len(self.clients)) if self.__available(index)]
+        results = await asyncio.gather(
+            *(self.__run(index, lambda client: client.fetch_object_list()) for index in indexes),
+            return_exceptions=True
+        )
+        objects: list[Object] = []
+        for index, result in zip(indexes, results):
+            if isinstance(result, (Unauthorized, RateLimited)):
+                self.__mark_failed(index, result)
+                continue
+            if isinstance(result, BaseException):
+                raise result
+            for obj in result:
+                self._owners[obj.id] = index
+            objects.extend(result)
+        return objects
+
+    @property
+    async def objects(self) -> list[Object]:
+        """Get all objects stored in the accounts of the pool
+
+        Uses the cache of each client when it has objects, otherwise makes a request"""
+
+        if any(len(client._cache.objects) == 0 for client in self.clients):
+            return await self.fetch_object_list()
+        return [obj for client in self.clients for obj in client._cache.objects]
+
+    def owner(self, obj: Object) -> Client:
+        """Returns the client of the account that stores the object
+
+        Params
+        ------------------
+        obj: Object
+            An object uploaded or listed by this pool
+
+        Raises
+        ------------------
+        ValueError: If the object wasn't uploaded or listed by this pool
+        """
+
+        if (index := self._owners.get(obj.id)) is None:
+            raise ValueError(f'Object {obj.id} is not stored in any account of the pool')
+        return self.clients[index]
+
+    async def delete_object(self, obj: Object) -> Any:
+        """Deletes an object from the account that stores it
+
+        Returns
+        ------------------
+        Response: The response of the deletion request
+        """
+
+        index = self.clients.index(self.owner(obj))
+        request = await self.__run(index, lambda client: client.delete_object(obj))
+        self._owners.pop(obj.id, None)
+        self._uploaded[index] -= obj.size
+        return request
+
+    async def download_object(self, obj: Object) -> None:
+        """Downloads an object using the client of the account that stores it"""
+
+        index = self._owners.get(obj.id, 0)
+        await self.__run(index, lambda client: client.download_object(obj))
@@ -0,0 +1,186 @@
+"""This module contains the scheduler that acts on the objects expiration"""
+
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Iterable, Literal
+
+from .data import Object
+from .utils import Logger
+
+if TYPE_CHECKING:
+    from .client import Client
+
+
+__all__ = ['ExpiryScheduler']
+
+
+class ExpiryScheduler:
+    """Evicts the expired objects from the caches and renews them before they expire
+
+    The expirations are kept in a min-heap keyed on the deadline, so the scheduler only
+    wakes up when the next deadline is reached.
+
+    Parameters
+    ------------------
+    client: Client
+        The client whose object cache and download directory are cleaned
+    renew: Callable[[Object], Awaitable[Any]] | None
+        Called `renew_ahead` seconds before each object expires, like a function that
+        uploads it again with a new `expire`. If it returns an Object, it's scheduled too.
+    renew_ahead: float
+        How many seconds before the expiration the object is renewed
+    concurrency: int
+        The max number of renewals running at the same time. Renewals due at the same
+        time run as a batch, without delaying the evictions
+    evict_downloads: bool
+        If True, the downloaded file of an expired object is removed from the download directory
+
+    Attributes
+    ------------------
+    pending: int
+        The number of deadlines scheduled
+    """
+
+    __logger = Logger(True)
+
+    def __init__(
+        self, client: 'Client', *, renew: Callable[[Object], Awaitable[Any]] | None = None,
+        renew_ahead: float = 86400, concurrency: int = 4, evict_downloads: bool = True
+    ) -> None:
+        self.client = client
+        self.renew = renew
+        self.renew_ahead = renew_ahead
+        self.evict_downloads = evict_downloads
+        self._heap: list[tuple[float, int, Literal['renew', 'expire'], Object, int]] = []
+        self._counter = itertools.count()
+        self._scheduled: dict[str, int] = {}
+        self._semaphore: asyncio.Semaphore = asyncio.Semaphore(concurrency)
+        self._wakeup: asyncio.Event = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._renewals: set[asyncio.Task] = set()
+
+    @property
+    def pending(self) -> int:
+        return sum(1 for entry in self._heap if self.__is_live(entry))
+
+    def __is_live(self, entry: tuple[float, int, Literal['renew', 'expire'], Object, int]) -> bool:
+        """Checks if the heap entry wasn't unscheduled"""
+
+        return self._scheduled.get(entry[3].id) == entry[4]
+
+    def schedule(self, objects: Iterable[Object]) -> None:
+        """Schedules the eviction (and renewal) of the objects that have an expiration
+
+        Objects already scheduled or without expiration are ignored.
+
+        Params
+        ------------------
+        objects: Iterable[Object]
+            The objects to be scheduled
+        """
+
+        earliest = self._heap[0][0] if self._heap else None
+        for obj in objects:
+            if obj.id in self._scheduled or (expiration := obj.expiration) is None:
+                continue
+            token = next(self._counter)
+            self._scheduled[obj.id] = token
+            deadline = expiration.timestamp()
+            heapq.heappush(self._heap, (deadline, next(self._counter), 'expire', obj, token))
+            if self.renew:
+                heapq.heappush(self._heap, (deadline - self.renew_ahead, next(self._counter), 'renew', obj, token))
+        if self._heap and (earliest is None or self._heap[0][0] < earliest):
+            self._wakeup.set()
+
+    def unschedule(self, obj_id: str) -> None:
+        """Cancels the eviction and renewal of an object, like when it's deleted
+
+        Params
+        ------------------
+        obj_id: str
+            The id of the object
+        """
+
+        self._scheduled.pop(obj_id, None)
+
+    def start(self) -> None:
+        """Starts waiting for the deadlines in background"""
+
+        if self._task and not self._task.done():
+            return
+        self._task = asyncio.get_event_loop().create_task(self.__run())
+
+    async def stop(self) -> None:
+        """Stops the scheduler"""
+
+        if not self._task:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def __run(self) -> None:
+        """Sleeps until the next deadline and handles every entry that's due"""
+
+        while True:
+            self._wakeup.clear()
+            timeout = self._heap[0][0] - time.time() if self._heap else None
+            if timeout is None or timeout > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            now = time.time()
+            expired: list[Object] = []
+            renewals: list[Object] = []
+            while self._heap and self._heap[0][0] <= now:
+                entry = heapq.heappop(self._heap)
+                if not self.__is_live(entry):
+                    continue
+                _, _, kind, obj, _ = entry
+                (expired if kind == 'expire' else renewals).append(obj)
+            if expired:
+                await self.__evict(expired)
+            for obj in renewals:
+                task = asyncio.get_event_loop().create_task(self.__renew(obj))
+                self._renewals.add(task)
+                task.add_done_callback(self._renewals.discard)
+
+    async def __evict(self, objects: list[Object]) -> None:
+        """Removes the expired objects from the object cache and the download directory"""
+
+        ids = {obj.id for obj in objects}
+        for obj_id in ids:
+            self._scheduled.pop(obj_id, None)
+        self.client._cache.objects = [obj for obj in self.client._cache.objects if obj.id not in ids]
+        self.__logger.info(f'Evicted {len(objects)} expired objects from cache')
+        for obj in objects:
+            try:
+                if self.evict_downloads:
+                    path: str = self.client.download_path+obj.id.split('/')[-1]
+                    if os.path.exists(path):
+                        os.remove(path)
+                if self.client._monitor:
+                    await self.client._monitor.release(obj.size)
+            except Exception as error:
+                self.__logger.warning(f'Failed to evict object {obj.id}: {error!r}')
+
+    async def __renew(self, obj: Object) -> None:
+        """Calls the renewal callback and schedules the object it returns"""
+
+        async with self._semaphore:
+            try:
+                result = await self.renew(obj)
+            except Exception as error:
+                self.__logger.warning(f'Failed to renew object {obj.id}: {error!r}')
+                return
+        self.__logger.info(f'Renewed object {obj.id}')
+        if isinstance(result, Object):
+            self.schedule([result])
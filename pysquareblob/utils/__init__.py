@@ -3,6 +3,7 @@ to use"""
 
 from .cache import Cache
 from .logs import Logger
-from .file import File
+from .file import File, StreamedFile
+from .compression import CompressionPolicy, Decompressor, is_compressed, uploaded_name
 
-__all__ = ['Cache', 'Logger', 'File']
\ No newline at end of file
+__all__ = ['Cache', 'Logger', 'File', 'StreamedFile', 'CompressionPolicy', 'Decompressor', 'is_compressed', 'uploaded_name']
\ No newline at end of file
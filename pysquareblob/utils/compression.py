@@ -0,0 +1,144 @@
+"""This module contains the compression policy applied to the uploaded files"""
+
+import asyncio
+from dataclasses import dataclass
+import gzip
+import re
+import zlib
+
+from .file import File
+
+
+__all__ = ['CompressionPolicy', 'Decompressor', 'is_compressed', 'uploaded_name']
+
+GZIP_MAGIC: bytes = b'\x1f\x8b'
+MARKER: str = '_gz'
+
+
+@dataclass(frozen=True)
+class CompressionPolicy:
+    """Decides which files are compressed with gzip before being uploaded
+
+    The name of a compressed object ends with `_gz`, so `download_object` knows it
+    must be decompressed. The mimetype is kept, so the object keeps its extension.
+
+    Parameters
+    ----------------
+    mimetypes: frozenset[str]
+        The mimetypes that are compressed
+    min_size: int
+        The min size of the file, in bytes, to be compressed
+    level: int
+        The gzip compression level, from 1 (fastest) to 9 (smallest)
+    """
+
+    mimetypes: frozenset[str] = frozenset({
+        'text/plain', 'text/csv', 'text/html', 'text/css', 'application/json',
+        'application/xml', 'application/javascript', 'application/x-sql', 'image/svg+xml'
+    })
+    min_size: int = 65_536
+    level: int = 6
+
+    def applies(self, file: File) -> bool:
+        """Checks if the file must be compressed"""
+
+        return file.mimetype in self.mimetypes and file.size >= self.min_size
+
+    async def compress(self, name: str, file: File) -> tuple[str, File]:
+        """Compresses the file in a thread, so the event loop isn't blocked
+
+        If the file isn't eligible or the compressed file isn't smaller (or would be under the
+        1KB min size of the service), the file is returned as it is.
+
+        Params
+        ------------
+        name: str
+            The name of the object
+        file: File
+            The file to be uploaded
+
+        Returns
+        ------------
+        tuple[str, File]: The name of the object, with `_gz` if compressed, and the file to upload
+        """
+
+        if not self.applies(file):
+            return name, file
+        compressed: bytes = await asyncio.to_thread(gzip.compress, file.bytes, self.level, mtime=0)
+        if len(compressed) >= file.size or len(compressed) < 1024:
+            return name, file
+        return name+MARKER, File(compressed, file.mimetype)
+
+
+def uploaded_name(object_id: str) -> str:
+    """Returns the name the object was uploaded with
+
+    The prefix, the extension and any suffix the service appends after the name
+    (like `-<hash>`) are removed. Names only have a to z, A to Z, 0 to 9, and _,
+    so the name ends at the first other character.
+
+    Params
+    ------------
+    object_id: str
+        The id of the object
+    """
+
+    basename = object_id.split('/')[-1]
+    return re.match(r'[a-zA-Z0-9_]*', basename).group()
+
+
+def is_compressed(object_id: str) -> bool:
+    """Checks if the object name has the compression marker
+
+    Params
+    ------------
+    object_id: str
+        The id of the object
+    """
+
+    return uploaded_name(object_id).endswith(MARKER)
+
+
+class Decompressor:
+    """Decompresses the chunks of a downloaded object while they arrive
+
+    The chunks are only decompressed when the object has the compression marker and
+    its content starts with the gzip magic bytes, otherwise they are kept as they are.
+
+    Parameters
+    ------------
+    object_id: str
+        The id of the object being downloaded
+    """
+
+    def __init__(self, object_id: str) -> None:
+        self.__enabled: bool | None = None if is_compressed(object_id) else False
+        self.__decompressor = zlib.decompressobj(wbits=31)
+        self.__head: bytes = b''
+
+    def feed(self, chunk: bytes) -> bytes:
+        """Returns the decompressed content of a chunk
+
+        The first bytes are held until there are enough to check the gzip magic bytes
+        """
+
+        if self.__enabled is None:
+            self.__head += chunk
+            if len(self.__head) < len(GZIP_MAGIC):
+                return b''
+            self.__enabled = self.__head.startswith(GZIP_MAGIC)
+            chunk, self.__head = self.__head, b''
+        if not self.__enabled:
+            return chunk
+        return self.__decompressor.decompress(chunk)
+
+    def flush(self) -> bytes:
+        """Returns what's left of the decompressed content"""
+
+        if self.__enabled is None:
+            # the content is too short to be compressed
+            head, self.__head = self.__head, b''
+            return head
+        if not self.__enabled:
+            return b''
+        return self.__decompressor.flush()
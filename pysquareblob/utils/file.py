@@ -3,6 +3,7 @@
 from io import BytesIO, BufferedIOBase, BufferedReader
 import os
 import sys
+from typing import AsyncIterable
 
 
 class File:
@@ -18,15 +19,21 @@ class File:
         elif isinstance(file, bytes):
             self.bytes = file
         else:
+            file_mime = self.__validate_type(file)
+            self.__validate_size(os.stat(file).st_size)
             file_opened = open(file, 'rb')
             self.bytes: bytes = file_opened.read()
             file_opened.close()
-            file_mime = self.__validate_type(file)
             if not mime: 
                 mime = file_mime
-        self.__validate_size(self.bytes)
+        self.__validate_size(len(self.bytes))
         self._mimetype: str|None = mime or self.mimetype
         
+    @property
+    def size(self) -> int:
+        """Get the size of the file in bytes"""
+        return len(self.bytes)
+        
     @property
     def mimetype(self) -> str:
         """Get the mimetype of the file
@@ -62,17 +69,17 @@ class File:
                     return mime
         raise ValueError('Could not determine the mimetype of the file')
  
-    def __validate_size(self, file: bytes) -> None:
+    def __validate_size(self, size: int) -> None:
         """Check if the file size is within the allowed range
         
         Params
         ------------
-        file: str | BytesIO | BufferedIOBase
+        size: int
+            The file size in bytes
         
         Raises
         ------------
         """
-        size: int = len(file)
         if 104_857_600 < size:
             raise ValueError('File size must be between 1KB and 100MB')
         elif size < 1024:
@@ -113,4 +120,25 @@ class File:
         }
         if not (mime := mimetypes.get(extension)):
             raise ValueError(f'Invalid file type: {extension}')
-        return mime
\ No newline at end of file
+        return mime
+
+
+class StreamedFile:
+    """Represents a file streamed to the Square Blob Storage service without being loaded in memory
+    
+    Parameters
+    ------------
+    stream: AsyncIterable[bytes]
+        The content of the file, in chunks
+    mimetype: str
+        The mimetype of the file
+    size: int
+        The size of the file in bytes
+    """
+    
+    def __init__(self, stream: AsyncIterable[bytes], mimetype: str, size: int) -> None:
+        if not (1024 <= size <= 104_857_600):
+            raise ValueError('File size must be between 1KB and 100MB')
+        self.bytes: AsyncIterable[bytes] = stream
+        self.mimetype: str = mimetype
+        self.size: int = size
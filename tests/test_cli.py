@@ -0,0 +1,97 @@
+import asyncio
+import json
+
+from pysquareblob import cli
+from pysquareblob.data import Object
+from pysquareblob.errors import FailedToDownload
+
+
+class FakeClient:
+    """Stores the objects in memory, failing the downloads of ids containing 'broken'"""
+
+    objects: list[Object] = []
+
+    def __init__(self, api_key, **kwargs):
+        self.uploaded: list[str] = []
+
+    async def open(self, limit=100):
+        pass
+
+    async def close(self):
+        pass
+
+    async def fetch_object_list(self):
+        return list(self.objects)
+
+    async def upload_object(self, name, file, *, prefix=None, **kwargs):
+        return Object(id=f'u/{prefix}/{name}.txt', size=file.size)
+
+    async def download_object(self, obj):
+        if 'broken' in obj.id:
+            raise FailedToDownload('Failed to download.')
+
+    async def delete_object(self, obj):
+        pass
+
+
+def run_cli(monkeypatch, tmp_path, *argv, objects=()):
+    monkeypatch.setattr(cli, 'Client', FakeClient)
+    monkeypatch.setattr(FakeClient, 'objects', list(objects))
+    summary = tmp_path / 'summary.json'
+    code = cli.main(['--key', 'key', '-q', '--summary', str(summary), *argv])
+    return code, json.loads(summary.read_text())
+
+
+def test_object_name_replaces_invalid_characters():
+    assert cli.object_name('some/dir/my file-1.final.txt') == 'my_file_1_final'
+
+
+def test_run_jobs_keeps_workers_alive_when_a_job_raises():
+    async def main():
+        stats = cli.Stats(live=False)
+        done = []
+
+        async def job(item):
+            if item % 2:
+                raise ValueError(item)
+            done.append(item)
+
+        await asyncio.wait_for(cli.run_jobs(range(1, 50), job, 2, stats), 5)
+        assert len(done) == 24
+        assert stats.failed == 25
+
+    asyncio.run(main())
+
+
+def test_ls_and_sync_match_the_prefix_by_path_segment(monkeypatch, tmp_path, capsys):
+    objects = [Object(id='u/img/a.png'), Object(id='u/other/img_1.png'), Object(id='u/img/sub/b.png')]
+    code, _ = run_cli(monkeypatch, tmp_path, 'ls', '--prefix', 'img', objects=objects)
+    assert code == 0
+    assert capsys.readouterr().out.split() == ['0', 'u/img/a.png', '0', 'u/img/sub/b.png']
+
+    (tmp_path / 'src').mkdir()
+    for name in ('a', 'img_1', 'c'):
+        (tmp_path / 'src' / f'{name}.png').write_bytes(b'x' * 2048)
+    code, summary = run_cli(monkeypatch, tmp_path, 'sync', str(tmp_path / 'src'), '--prefix', 'img', objects=objects)
+    assert (code, summary['done']) == (0, 2)
+
+
+def test_failures_are_counted_and_set_the_exit_code(monkeypatch, tmp_path):
+    objects = [Object(id='u/ok.txt', size=3), Object(id='u/broken.txt', size=5)]
+    code, summary = run_cli(monkeypatch, tmp_path, 'get', 'u/*', objects=objects)
+    assert code == 1
+    assert (summary['done'], summary['failed'], summary['bytes']) == (1, 1, 3)
+    assert summary['errors'][0]['item'] == 'u/broken.txt'
+
+
+def test_upload_records_a_file_removed_after_the_glob(tmp_path):
+    async def main():
+        stats = cli.Stats(live=False)
+        args = cli.parser().parse_args(['--key', 'key', 'put', 'x'])
+        (tmp_path / 'here.txt').write_bytes(b'x' * 2048)
+        for name in ('here.txt', 'gone.txt'):
+            await cli.upload(FakeClient('key'), args, stats, str(tmp_path / name))
+        assert (stats.done, stats.failed, stats.bytes) == (1, 1, 2048)
+        assert stats.errors[0]['item'].endswith('gone.txt')
+
+    asyncio.run(main())
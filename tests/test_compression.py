@@ -0,0 +1,63 @@
+import asyncio
+import json
+
+import pytest
+
+from pysquareblob.utils import CompressionPolicy, Decompressor, File, is_compressed, uploaded_name
+
+
+CONTENT = json.dumps([{'id': index, 'name': f'item {index}'} for index in range(5000)]).encode()
+
+
+def compressed(policy=CompressionPolicy(min_size=1024)):
+    return asyncio.run(policy.compress('data', File(CONTENT, 'application/json')))
+
+
+def decompress(object_id, content, first):
+    decompressor = Decompressor(object_id)
+    chunks = [content[:first]] + [content[index:index + 1000] for index in range(first, len(content), 1000)]
+    return b''.join(decompressor.feed(chunk) for chunk in chunks) + decompressor.flush()
+
+
+def test_compress_marks_the_name_and_keeps_the_mimetype():
+    name, file = compressed()
+    assert name == 'data_gz'
+    assert file.mimetype == 'application/json'
+    assert file.size < len(CONTENT)
+
+
+def test_policy_skips_small_files_and_other_mimetypes():
+    policy = CompressionPolicy(min_size=len(CONTENT) + 1)
+    assert not policy.applies(File(CONTENT, 'application/json'))
+    assert not CompressionPolicy(min_size=1024).applies(File(CONTENT, 'image/png'))
+    name, file = compressed(policy)
+    assert (name, file.bytes) == ('data', CONTENT)
+
+
+@pytest.mark.parametrize('first', [1, 2, 3, 100])
+def test_decompressor_round_trips_split_chunks(first):
+    _, file = compressed()
+    assert decompress('u/p/data_gz-abc.json', file.bytes, first) == CONTENT
+
+
+@pytest.mark.parametrize('first', [1, 100])
+def test_decompressor_passes_through_uncompressed_content(first):
+    _, file = compressed()
+    assert decompress('u/p/data-abc.json', file.bytes, first) == file.bytes
+    assert decompress('u/p/data_gz-abc.json', CONTENT, first) == CONTENT
+
+
+def test_decompressor_keeps_content_shorter_than_the_magic_bytes():
+    decompressor = Decompressor('u/x_gz.txt')
+    assert decompressor.feed(b'a') + decompressor.flush() == b'a'
+
+
+@pytest.mark.parametrize('object_id, name, marked', [
+    ('u/p/x_gz-abc.csv', 'x_gz', True),
+    ('u/x_gz.csv', 'x_gz', True),
+    ('u/p/x-abc.csv', 'x', False),
+    ('x_gzz.csv', 'x_gzz', False),
+])
+def test_uploaded_name_and_marker(object_id, name, marked):
+    assert uploaded_name(object_id) == name
+    assert is_compressed(object_id) is marked
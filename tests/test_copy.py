@@ -0,0 +1,130 @@
+import asyncio
+import os
+
+import aiohttp
+from aiohttp import web
+import pytest
+
+from pysquareblob import Client
+from pysquareblob._http import Endpoint
+from pysquareblob.data import Object
+from pysquareblob.errors import FailedToDownload
+
+
+CONTENT = os.urandom(3_000_000)
+
+
+async def serve(monkeypatch):
+    """Starts a local server for the public URLs and the upload endpoint
+
+    The uploaded bytes are stored by object name. The object 'broken' closes the
+    connection halfway through the download and 'missing' returns a 404.
+    """
+
+    uploads: dict[str, bytes] = {}
+
+    async def download(request: web.Request) -> web.StreamResponse:
+        name = request.match_info['name']
+        if name.startswith('missing'):
+            raise web.HTTPNotFound()
+        response = web.StreamResponse(headers={'Content-Type': 'text/csv'})
+        response.content_length = len(CONTENT)
+        await response.prepare(request)
+        for index in range(0, len(CONTENT), 100_000):
+            if name.startswith('broken') and index >= len(CONTENT) // 2:
+                request.transport.close()
+                return response
+            await response.write(CONTENT[index:index + 100_000])
+        return response
+
+    async def upload(request: web.Request) -> web.Response:
+        part = await (await request.multipart()).next()
+        name = request.query['name']
+        uploads[name] = await part.read()
+        prefix = f"{request.query['prefix']}/" if 'prefix' in request.query else ''
+        return web.json_response({
+            'status': 'success', 'response': {'id': f'u/{prefix}{name}.csv', 'size': len(uploads[name])}
+        })
+
+    app = web.Application(client_max_size=10**9)
+    app.router.add_get('/public/u/{name}', download)
+    app.router.add_post('/v1/objects', upload)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    base = f'http://127.0.0.1:{runner.addresses[0][1]}'
+    monkeypatch.setattr(Endpoint, '__repr__', lambda self: f'{base}/v1/{self.path}')
+    monkeypatch.setattr(Object, 'url', property(lambda self: f'{base}/public/{self.id}'))
+    return runner, uploads
+
+
+def test_copy_streams_the_object_to_the_target(monkeypatch, tmp_path):
+    async def main():
+        runner, uploads = await serve(monkeypatch)
+        async with Client('key', debug=False, download_path=f'{tmp_path}/') as client:
+            await client.open(limit=1)
+            source = Object(id='u/report.csv', size=len(CONTENT))
+            copy = await asyncio.wait_for(client.copy_object(source, client, 'copy', 'backup', chunk_size=4096), 10)
+            assert (copy.id, copy.size) == ('u/backup/copy.csv', len(CONTENT))
+            assert uploads['copy'] == CONTENT
+
+            copy = await client.copy_object(Object(id='u/report_gz-1.csv'), client, 'other')
+            assert copy.id == 'u/other_gz.csv'
+        await runner.cleanup()
+
+    asyncio.run(main())
+
+
+def test_failed_download_reaches_the_upload_as_an_error(monkeypatch, tmp_path):
+    async def main():
+        runner, uploads = await serve(monkeypatch)
+        client = Client('key', debug=False, download_path=f'{tmp_path}/')
+        with pytest.raises(FailedToDownload):
+            await client.copy_object(Object(id='u/missing.csv'), client, 'copy')
+        with pytest.raises(aiohttp.ClientError) as error:
+            await asyncio.wait_for(client.copy_object(Object(id='u/broken.csv'), client, 'copy'), 10)
+        assert isinstance(error.value.__cause__ or error.value, aiohttp.ClientPayloadError)
+        assert 'copy' not in uploads
+        await runner.cleanup()
+
+    asyncio.run(main())
+
+
+def test_failed_upload_cancels_the_reader(monkeypatch, tmp_path):
+    async def main():
+        runner, _ = await serve(monkeypatch)
+        client = Client('key', debug=False, download_path=f'{tmp_path}/')
+        target = Client('key', debug=False, download_path=f'{tmp_path}/')
+
+        async def upload(name, file, **kwargs):
+            async for _ in file.bytes:
+                raise ConnectionError('upload failed')
+
+        target._upload = upload
+        with pytest.raises(ConnectionError):
+            await asyncio.wait_for(
+                client.copy_object(Object(id='u/report.csv'), target, 'copy', chunk_size=1024, buffer_chunks=2), 10
+            )
+        await asyncio.sleep(0)
+        readers = [task for task in asyncio.all_tasks() if 'copy_object.<locals>.read' in repr(task.get_coro())]
+        assert readers == []
+        await runner.cleanup()
+
+    asyncio.run(main())
+
+
+def test_migrate_returns_the_failures_in_order(monkeypatch, tmp_path):
+    async def main():
+        runner, uploads = await serve(monkeypatch)
+        async with Client('key', debug=False, download_path=f'{tmp_path}/') as client:
+            objects = [Object(id='u/a.csv'), Object(id='u/missing.csv'), Object(id='u/b_gz-2.csv')]
+            results = await asyncio.wait_for(client.migrate(objects, client, prefix='moved', concurrency=2), 10)
+        assert [result.id for result in results if isinstance(result, Object)] == [
+            'u/moved/a.csv', 'u/moved/b_gz.csv'
+        ]
+        assert isinstance(results[1], FailedToDownload)
+        assert uploads['a'] == uploads['b_gz'] == CONTENT
+        await runner.cleanup()
+
+    asyncio.run(main())
@@ -0,0 +1,81 @@
+import json
+
+import pytest
+
+from pysquareblob._http import Decoder, Endpoint
+from pysquareblob.data import Account, Billing, Object
+
+
+OBJECTS = json.dumps({'status': 'success', 'response': {'objects': [
+    {'id': 'u/a.txt', 'size': 1024, 'created_at': '2026-01-01T00:00:00Z', 'expires_at': None},
+    {'id': 'u/b.txt', 'size': None},
+]}}).encode()
+
+ACCOUNT = json.dumps({'status': 'success', 'response': {
+    'usage': {'objects': 2, 'storage': 2048},
+    'plan': {'included': None},
+    'billing': {'extraStorage': 0, 'storagePrice': 0.5, 'totalEstimate': 1.5},
+}}).encode()
+
+ERROR = json.dumps({'status': 'error', 'code': 'ACCESS_DENIED'}).encode()
+
+
+def fields(response):
+    if isinstance(response, list):
+        return [(obj.id, obj.size, obj.created_at, obj.expires_at) for obj in response]
+    return response
+
+
+def decoders():
+    pytest.importorskip('msgspec')
+    return Decoder(), Decoder(json.loads)
+
+
+def test_typed_path_builds_objects_and_accounts():
+    typed, _ = decoders()
+    data = typed.decode(OBJECTS, Endpoint.objects())
+    assert data['status'] == 'success'
+    assert fields(data['response']) == [
+        ('u/a.txt', 1024, '2026-01-01T00:00:00Z', None), ('u/b.txt', 0, '', '')
+    ]
+    assert typed.decode(ACCOUNT, Endpoint.account_info())['response'] == Account(2, 2048, 0, Billing(0, 0.5, 0, 1.5))
+
+
+@pytest.mark.parametrize('body, endpoint', [
+    (OBJECTS, Endpoint.objects()), (ACCOUNT, Endpoint.account_info()),
+    (b'{"status": "success", "response": {"objects": [{"id": "u/a.txt"}]}}', Endpoint.objects()),
+    (b'{"status": "success", "response": {"usage": {"objects": 1}}}', Endpoint.account_info()),
+])
+def test_both_paths_decode_the_same(body, endpoint):
+    typed, stdlib = decoders()
+    assert fields(typed.decode(body, endpoint)['response']) == fields(stdlib.decode(body, endpoint)['response'])
+
+
+def test_falls_back_to_the_dict_path_on_unexpected_types():
+    typed, _ = decoders()
+    body = b'{"status": "success", "response": {"objects": [{"id": "u/a.txt", "size": "1024"}]}}'
+    assert fields(typed.decode(body, Endpoint.objects())['response']) == [('u/a.txt', '1024', '', '')]
+    body = b'{"status": "success", "response": {"usage": [], "plan": {"included": 10}}}'
+    assert typed.decode(body, Endpoint.account_info())['response'] == Account(0, 0, 10, Billing(0, 0, 0, 0))
+
+
+def test_user_loads_is_used_for_every_endpoint():
+    calls = []
+
+    def loads(body):
+        calls.append(body)
+        return json.loads(body)
+
+    decoder = Decoder(loads)
+    assert fields(decoder.decode(OBJECTS, Endpoint.objects())['response'])[0][0] == 'u/a.txt'
+    assert decoder.decode(b'{"status": "success"}', Endpoint.delete()) == {'status': 'success'}
+    assert len(calls) == 2
+
+
+@pytest.mark.parametrize('loads', [None, json.loads])
+def test_error_envelopes(loads):
+    decoder = Decoder(loads)
+    objects = decoder.decode(ERROR, Endpoint.objects())
+    account = decoder.decode(ERROR, Endpoint.account_info())
+    assert (objects['status'], objects['code'], objects['response']) == ('error', 'ACCESS_DENIED', [])
+    assert (account['status'], account['code'], account['response']) == ('error', 'ACCESS_DENIED', None)
@@ -0,0 +1,158 @@
+import asyncio
+
+import pytest
+
+from pysquareblob import UsageMonitor
+from pysquareblob.data import Account, Billing
+from pysquareblob.errors import QuotaExceeded, UsageUnavailable
+
+
+class FakeClient:
+    """Returns the given account info, or raises it if it's an exception"""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = 0
+
+    async def fetch_account_info(self):
+        result = self.results[min(self.calls, len(self.results) - 1)]
+        self.calls += 1
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def account(occupied=500, included=1000, billing=None):
+    return Account(1, occupied, included, billing or Billing(0, 0, 0, 0))
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_reserve_commits_on_success_and_releases_on_failure():
+    async def main():
+        monitor = UsageMonitor(FakeClient(account()))
+        await monitor.refresh()
+        async with monitor.reserve(100):
+            assert monitor.in_flight == 100
+        assert (monitor.in_flight, monitor.committed) == (0, 100)
+        with pytest.raises(RuntimeError):
+            async with monitor.reserve(100):
+                raise RuntimeError
+        assert (monitor.in_flight, monitor.committed) == (0, 100)
+        await monitor.release(50)
+        assert monitor.projected_storage == 550
+
+    run(main())
+
+
+def test_reject_mode_raises_over_budget():
+    async def main():
+        monitor = UsageMonitor(FakeClient(account()), storage_budget=800)
+        await monitor.refresh()
+        async with monitor.reserve(300):
+            pass
+        with pytest.raises(QuotaExceeded):
+            async with monitor.reserve(1):
+                pass
+
+    run(main())
+
+
+def test_wait_mode_resumes_after_release():
+    async def main():
+        monitor = UsageMonitor(FakeClient(account()), mode='wait')
+        await monitor.refresh()
+        async with monitor.reserve(400):
+            pass
+
+        async def free():
+            await asyncio.sleep(0.05)
+            await monitor.release(300)
+
+        async def upload():
+            async with monitor.reserve(200):
+                return monitor.in_flight
+
+        freeing = asyncio.create_task(free())
+        assert await asyncio.wait_for(upload(), 1) == 200
+        await freeing
+        assert monitor.committed == 300
+
+    run(main())
+
+
+def test_wait_mode_rejects_upload_larger_than_budget():
+    async def main():
+        monitor = UsageMonitor(FakeClient(account()), mode='wait')
+        await monitor.refresh()
+
+        async def upload():
+            async with monitor.reserve(1001):
+                pass
+
+        with pytest.raises(QuotaExceeded):
+            await asyncio.wait_for(upload(), 1)
+
+    run(main())
+
+
+def test_reserve_fails_fast_when_refresh_fails():
+    async def main():
+        client = FakeClient(ConnectionError('unreachable'), account())
+        monitor = UsageMonitor(client, ready_timeout=0.1, retry_interval=0.1)
+        monitor.start()
+        with pytest.raises(UsageUnavailable):
+            async with monitor.reserve(100):
+                pass
+        await asyncio.sleep(0.2)
+        async with monitor.reserve(100):
+            pass
+        await monitor.stop()
+        assert client.calls == 2
+
+    run(main())
+
+
+def test_refresh_rejects_missing_account_info():
+    async def main():
+        monitor = UsageMonitor(FakeClient(None), ready_timeout=0.1)
+        with pytest.raises(UsageUnavailable):
+            await monitor.refresh()
+        assert monitor.account is None
+        with pytest.raises(UsageUnavailable):
+            async with monitor.reserve(100):
+                pass
+
+    run(main())
+
+
+def test_refresh_keeps_committed_bytes_until_snapshot_changes():
+    async def main():
+        client = FakeClient(account(), account(), account(occupied=600))
+        monitor = UsageMonitor(client)
+        await monitor.refresh()
+        async with monitor.reserve(100):
+            pass
+        await monitor.refresh()
+        assert monitor.committed == 100
+        await monitor.refresh()
+        assert (monitor.committed, monitor.projected_storage) == (0, 600)
+
+    run(main())
+
+
+def test_cost_budget_uses_the_extra_storage_price():
+    async def main():
+        billing = Billing(extra_storage=1000, storage_price=10, objects_price=0, total_estimate=10)
+        monitor = UsageMonitor(
+            FakeClient(account(occupied=2000, included=1000, billing=billing)),
+            storage_budget=10_000, cost_budget=15
+        )
+        await monitor.refresh()
+        assert monitor.projected_cost(400) == pytest.approx(14)
+        assert monitor.fits(400)
+        assert not monitor.fits(600)
+
+    run(main())
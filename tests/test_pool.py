@@ -0,0 +1,154 @@
+import asyncio
+from collections import Counter
+
+import pytest
+
+from pysquareblob import ClientPool
+from pysquareblob.data import Account, Billing, Object
+from pysquareblob.errors import RateLimited, Unauthorized
+
+
+def make_pool(tmp_path, keys, **kwargs):
+    pool = ClientPool(keys, debug=False, download_path=f'{tmp_path}/', **kwargs)
+    calls = Counter()
+    for key, client in zip(keys, pool.clients):
+        async def upload_object(name, file, *, prefix=None, key=key, **options):
+            calls[key] += 1
+            if key.startswith('bad'):
+                raise Unauthorized('Unauthorized.')
+            if key.startswith('limited'):
+                raise RateLimited('Rate limited.')
+            return Object(id=f'{key}/{prefix}/{name}.txt', size=1000)
+
+        client.upload_object = upload_object
+    return pool, calls
+
+
+def account(occupied):
+    return Account(0, occupied, 10**9, Billing(0, 0, 0, 0))
+
+
+def test_hash_spreads_a_prefix_across_keys(tmp_path):
+    async def main():
+        pool, calls = make_pool(tmp_path, ['a', 'b', 'c'])
+        for index in range(300):
+            await pool.upload_object(f'file_{index}', b'x', prefix='images')
+        assert set(calls) == {'a', 'b', 'c'}
+        assert min(calls.values()) > 50
+
+        pool, calls = make_pool(tmp_path, ['a', 'b', 'c'], prefix_affinity=True)
+        for index in range(30):
+            await pool.upload_object(f'file_{index}', b'x', prefix='images')
+        assert len(calls) == 1
+
+    asyncio.run(main())
+
+
+def test_hash_routing_is_consistent(tmp_path):
+    async def main():
+        pool, _ = make_pool(tmp_path, ['a', 'b', 'c'])
+        first = [(await pool.upload_object(f'n{index}', b'x')).id for index in range(20)]
+        second = [(await pool.upload_object(f'n{index}', b'x')).id for index in range(20)]
+        assert first == second
+
+    asyncio.run(main())
+
+
+def test_unauthorized_key_fails_over_and_is_dropped(tmp_path):
+    async def main():
+        pool, calls = make_pool(tmp_path, ['bad', 'good'], strategy='least_loaded')
+        for index in range(5):
+            obj = await pool.upload_object(f'n{index}', b'x')
+            assert obj.id.startswith('good/')
+        assert calls['bad'] == 1
+
+    asyncio.run(main())
+
+
+def test_rate_limited_key_is_skipped_during_cooldown(tmp_path):
+    async def main():
+        pool, calls = make_pool(tmp_path, ['limited', 'good'], strategy='least_loaded', cooldown=60)
+        for index in range(5):
+            await pool.upload_object(f'n{index}', b'x')
+        assert calls == {'limited': 1, 'good': 5}
+
+    asyncio.run(main())
+
+
+def test_all_keys_unavailable_raises(tmp_path):
+    async def main():
+        pool, _ = make_pool(tmp_path, ['bad_1', 'bad_2'])
+        with pytest.raises(Unauthorized):
+            await pool.upload_object('n', b'x')
+        with pytest.raises(RateLimited):
+            await pool.upload_object('n', b'x')
+
+    asyncio.run(main())
+
+
+def test_least_storage_counts_uploads_until_the_snapshot_changes(tmp_path):
+    async def main():
+        pool, calls = make_pool(tmp_path, ['a', 'b'], strategy='least_storage')
+        pool.clients[0]._cache.account_info = account(0)
+        pool.clients[1]._cache.account_info = account(2500)
+        for index in range(6):
+            await pool.upload_object(f'n{index}', b'x')
+        assert calls == {'a': 4, 'b': 2}
+
+        # the cache was cleared and refetched, but the API still returns the same snapshot
+        pool.clients[0]._cache.account_info = account(0)
+        await pool.upload_object('n6', b'x')
+        await pool.upload_object('n7', b'x')
+        assert calls == {'a': 5, 'b': 3}
+
+        # new snapshots already count the uploads, so the local counts start over
+        pool.clients[0]._cache.account_info = account(5000)
+        pool.clients[1]._cache.account_info = account(5500)
+        await pool.upload_object('n8', b'x')
+        assert calls['a'] == 6
+        assert pool._uploaded == [1000, 0]
+
+    asyncio.run(main())
+
+
+def test_least_storage_skips_unavailable_keys(tmp_path):
+    async def main():
+        pool, _ = make_pool(tmp_path, ['bad', 'good'], strategy='least_storage')
+        fetches = Counter()
+
+        async def fetch_account_info():
+            fetches['bad'] += 1
+            raise Unauthorized('Unauthorized.')
+
+        pool.clients[0].fetch_account_info = fetch_account_info
+        pool.clients[1]._cache.account_info = account(10**6)
+        for index in range(5):
+            await pool.upload_object(f'n{index}', b'x')
+        assert fetches['bad'] == 1
+
+    asyncio.run(main())
+
+
+def test_listing_is_merged_and_objects_are_routed_to_their_owner(tmp_path):
+    async def main():
+        pool, _ = make_pool(tmp_path, ['a', 'b', 'limited'])
+        deleted = []
+        for key, client in zip(['a', 'b', 'limited'], pool.clients):
+            async def fetch_object_list(key=key):
+                if key == 'limited':
+                    raise RateLimited('Rate limited.')
+                return [Object(id=f'{key}/1.txt'), Object(id=f'{key}/2.txt')]
+
+            async def delete_object(obj, key=key):
+                deleted.append((key, obj.id))
+
+            client.fetch_object_list = fetch_object_list
+            client.delete_object = delete_object
+        objects = await pool.fetch_object_list()
+        assert sorted(obj.id for obj in objects) == ['a/1.txt', 'a/2.txt', 'b/1.txt', 'b/2.txt']
+        await pool.delete_object(objects[-1])
+        assert deleted == [('b', 'b/2.txt')]
+        with pytest.raises(ValueError):
+            pool.owner(Object(id='c/1.txt'))
+
+    asyncio.run(main())
@@ -0,0 +1,119 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+import os
+
+from pysquareblob import Client
+from pysquareblob._http import Response
+from pysquareblob.data import Object
+
+
+def expiring(object_id, seconds, size=1):
+    expires_at = (datetime.now(timezone.utc) + timedelta(seconds=seconds)).isoformat()
+    return Object(id=object_id, size=size, expires_at=expires_at)
+
+
+def client(tmp_path):
+    return Client('key', debug=False, download_path=f'{tmp_path}/')
+
+
+def test_evicts_expired_objects_from_cache_and_downloads(tmp_path):
+    async def main():
+        blob = client(tmp_path)
+        soon, later = expiring('u/soon.txt', 0.1), expiring('u/later.txt', 60)
+        blob._cache.objects = [soon, later, Object(id='u/forever.txt')]
+        (tmp_path / 'soon.txt').write_bytes(b'content')
+        scheduler = blob.start_expiry_scheduler()
+        assert scheduler.pending == 2
+        await asyncio.sleep(0.3)
+        assert [obj.id for obj in blob._cache.objects] == ['u/later.txt', 'u/forever.txt']
+        assert not os.path.exists(tmp_path / 'soon.txt')
+        assert scheduler.pending == 1
+        await blob.stop_expiry_scheduler()
+
+    asyncio.run(main())
+
+
+def test_renews_ahead_of_deadline_and_schedules_the_result(tmp_path):
+    async def main():
+        blob = client(tmp_path)
+        renewed = []
+
+        async def renew(obj):
+            renewed.append(obj.id)
+            return expiring(obj.id + '_new', 60)
+
+        scheduler = blob.start_expiry_scheduler(renew=renew, renew_ahead=0.5)
+        scheduler.schedule([expiring('u/a.txt', 0.6), expiring('u/b.txt', 60)])
+        await asyncio.sleep(0.3)
+        assert renewed == ['u/a.txt']
+        assert 'u/a.txt_new' in scheduler._scheduled
+        await blob.stop_expiry_scheduler()
+
+    asyncio.run(main())
+
+
+def test_unscheduled_objects_are_not_renewed_or_evicted(tmp_path):
+    async def main():
+        blob = client(tmp_path)
+        renewed = []
+
+        async def renew(obj):
+            renewed.append(obj.id)
+
+        obj = expiring('u/a.txt', 0.2)
+        blob._cache.objects = [obj]
+        scheduler = blob.start_expiry_scheduler(renew=renew, renew_ahead=0.1)
+        scheduler.unschedule(obj.id)
+        assert scheduler.pending == 0
+        await asyncio.sleep(0.3)
+        assert renewed == []
+        assert blob._cache.objects == [obj]
+        await blob.stop_expiry_scheduler()
+
+    asyncio.run(main())
+
+
+def test_delete_unschedules_and_releases_the_bytes_once(tmp_path):
+    async def main():
+        blob = client(tmp_path)
+        renewed = []
+
+        async def renew(obj):
+            renewed.append(obj.id)
+
+        async def make_request(endpoint, **kwargs):
+            return Response({'status': 'success'}, endpoint, 200)
+
+        blob._Client__http.make_request = make_request
+        released = []
+
+        class Monitor:
+            async def release(self, size):
+                released.append(size)
+
+        blob._monitor = Monitor()
+        obj = expiring('u/a.txt', 0.2, size=100)
+        scheduler = blob.start_expiry_scheduler(renew=renew, renew_ahead=0.1)
+        scheduler.schedule([obj])
+        await blob.delete_object(obj)
+        await asyncio.sleep(0.3)
+        assert renewed == []
+        assert released == [100]
+        await blob.stop_expiry_scheduler()
+
+    asyncio.run(main())
+
+
+def test_failed_eviction_is_logged_and_the_scheduler_keeps_running(tmp_path):
+    async def main():
+        blob = client(tmp_path)
+        (tmp_path / 'dir.txt').mkdir()
+        (tmp_path / 'file.txt').write_bytes(b'content')
+        scheduler = blob.start_expiry_scheduler()
+        scheduler.schedule([expiring('u/dir.txt', 0.05), expiring('u/file.txt', 0.2)])
+        await asyncio.sleep(0.4)
+        assert not os.path.exists(tmp_path / 'file.txt')
+        assert scheduler.pending == 0
+        await blob.stop_expiry_scheduler()
+
+    asyncio.run(main())